@@ -1,67 +1,158 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Awaitable, Optional, Set, Tuple, Union
+import asyncio
 import logging
-from utils.mcp_search import mcp_search, SearchResult
+import os
+import time
+from utils.mcp_search import mcp_search, SearchResult, SearchDecision
 from utils.dynamic_sources import dynamic_source_generator, ValidatedSource
+from utils.source_jobs import source_jobs
+from utils.keyword_matcher import KeywordMatcher
+from utils.query_context import QueryContext, QueryLike
 
 logger = logging.getLogger(__name__)
 
+# Return responses without waiting for their sources; sources are generated
+# on the background queue and delivered through sources_pending
+DEFER_SOURCES = os.getenv("DEFER_SOURCES", "false").lower() == "true"
+
 class BaseAgent(ABC):
     def __init__(self, name: str, expertise: str):
         self.name = name
         self.expertise = expertise
         self.confidence = 0.0
         
-    def assess_relevance(self, query: str) -> float:
+    @property
+    def keyword_matcher(self) -> KeywordMatcher:
+        """Matcher over this agent's keyword sets, compiled once per agent class"""
+        cls = type(self)
+        matcher = cls.__dict__.get("_keyword_matcher")
+        if matcher is None:
+            matcher = KeywordMatcher(self._get_keyword_sets())
+            cls._keyword_matcher = matcher
+        return matcher
+    
+    def match_keywords(self, query: QueryLike) -> Dict[str, Set[str]]:
+        """Matched keywords for every keyword set, scanned once per query context"""
+        return QueryContext.of(query).keyword_hits(self.keyword_matcher)
+    
+    def assess_relevance(self, query: QueryLike) -> float:
         """Assess how relevant this agent is for the given query"""
-        query_lower = query.lower()
-        
-        # Define keywords for this agent's expertise
-        keywords = self._get_expertise_keywords()
+        keywords = self.keyword_matcher.keyword_sets["expertise"]
         
         # Calculate relevance based on keyword matches
-        matches = sum(1 for keyword in keywords if keyword in query_lower)
+        matches = len(self.match_keywords(query)["expertise"])
         relevance = min(matches / len(keywords) * 2, 1.0)  # Cap at 1.0
         
         self.confidence = relevance
         return relevance
     
-    async def generate_response(self, query: str, use_search: bool = True) -> Dict[str, Any]:
-        """Generate a response to the query from this agent's perspective with dynamic sources"""
+    async def generate_response(
+        self, 
+        query: QueryLike, 
+        use_search: bool = True,
+        search_decision: Union[SearchDecision, Awaitable[Optional[SearchDecision]], None] = None,
+        defer_sources: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a response to the query from this agent's perspective with dynamic sources
+        
+        A precomputed search_decision (e.g. from a batched orchestrator call)
+        skips this agent's own LLM search decision. It may also be an awaitable
+        still being decided; a None result falls back to this agent's own
+        decision.
+        
+        With defer_sources (default DEFER_SOURCES) the response comes back
+        with empty sources and a sources_pending job id to collect them from
+        the background source queue; sources_pending is None otherwise.
+        """
+        query = QueryContext.of(query)
+        
         # Check if we should enhance response with search data using LLM decision
         search_context = ""
         search_results = []
         
         if use_search:
-            search_decision = await mcp_search.should_search(query, self.expertise, self.name)
-            if search_decision.should_search:
-                search_results = await self._perform_contextual_search(query)
-                if search_results:
-                    search_context = mcp_search.format_search_context(search_results, query, search_decision.search_type)
-                    logger.info(f"Enhanced {self.name} response with {len(search_results)} search results ({search_decision.reasoning})")
+            if isinstance(search_decision, SearchDecision):
+                if search_decision.should_search:
+                    search_results = await self._perform_contextual_search(query)
+            else:
+                search_decision, search_results = await self._decide_and_search(query, search_decision)
+            if search_results:
+                search_context = mcp_search.format_search_context(search_results, query.raw, search_decision.search_type)
+                logger.info(f"Enhanced {self.name} response with {len(search_results)} search results ({search_decision.reasoning})")
         
         # Generate the main response
         response_text = self._generate_specialized_response(query, search_context)
         
         # Generate dynamic validated sources based on response content
-        sources = await self.generate_dynamic_sources(response_text)
+        sources, sources_pending = [], None
+        if defer_sources if defer_sources is not None else DEFER_SOURCES:
+            sources_pending = await source_jobs.submit(lambda: self.generate_dynamic_sources(response_text))
+        else:
+            sources = await self.generate_dynamic_sources(response_text)
         
         return {
             "content": response_text,
             "sources": sources,
+            "sources_pending": sources_pending,
             "search_enhanced": len(search_results) > 0,
             "source_count": len(sources)
         }
     
-    def generate_insights(self, query: str) -> List[str]:
+    async def _decide_and_search(
+        self,
+        query: QueryContext,
+        pending_decision: Optional[Awaitable[Optional[SearchDecision]]]
+    ) -> Tuple[SearchDecision, List[SearchResult]]:
+        """
+        Wait for the search decision, then search if it says so. In
+        speculative mode, time-sensitive queries start the search at the same
+        time and cancel it if the decision comes back negative.
+        """
+        async def decide() -> SearchDecision:
+            decision = await pending_decision if pending_decision is not None else None
+            return decision or await mcp_search.should_search(query, self.expertise, self.name)
+        
+        if not mcp_search.should_speculate(query):
+            decision = await decide()
+            results = await self._perform_contextual_search(query) if decision.should_search else []
+            return decision, results
+        
+        started = time.monotonic()
+        finished = []
+        
+        async def timed_search() -> List[SearchResult]:
+            try:
+                return await self._perform_contextual_search(query)
+            finally:
+                finished.append(time.monotonic())
+        
+        search_task = asyncio.create_task(timed_search())
+        try:
+            decision = await decide()
+        except BaseException:
+            search_task.cancel()
+            raise
+        overlap = min([time.monotonic()] + finished) - started
+        
+        if decision.should_search:
+            mcp_search.record_speculation(used=True, overlap_seconds=overlap)
+            return decision, await search_task
+        
+        search_task.cancel()
+        mcp_search.record_speculation(used=False, overlap_seconds=overlap)
+        return decision, []
+    
+    def generate_insights(self, query: QueryLike) -> List[str]:
         """Generate insights related to the query"""
         return self._generate_specialized_insights(query)
     
-    def generate_recommendations(self, query: str) -> List[str]:
+    def generate_recommendations(self, query: QueryLike) -> List[str]:
         """Generate recommendations based on the query"""
         return self._generate_specialized_recommendations(query)
     
-    async def _perform_contextual_search(self, query: str) -> List[SearchResult]:
+    async def _perform_contextual_search(self, query: QueryContext) -> List[SearchResult]:
         """
         Perform MCP search with expertise-specific context
         Only searches when agent deems it necessary for comprehensive response
@@ -69,8 +160,8 @@ class BaseAgent(ABC):
         # Get expertise-specific keywords
         expertise_keywords = self._get_expertise_keywords()[:3]  # Top 3 keywords
         
-        logger.info(f"{self.name} performing contextual search for: {query}")
-        return mcp_search.search(query, self.expertise.lower(), expertise_keywords, max_results=5)
+        logger.info(f"{self.name} performing contextual search for: {query.raw}")
+        return await mcp_search.search(query.raw, self.expertise.lower(), expertise_keywords, max_results=5)
     
     async def generate_dynamic_sources(self, response: str) -> List[str]:
         """
@@ -102,12 +193,19 @@ class BaseAgent(ABC):
         """Return keywords associated with this agent's expertise"""
         pass
     
+    def _get_keyword_sets(self) -> Dict[str, List[str]]:
+        """
+        Named keyword sets compiled into this agent's matcher - subclasses
+        can extend this with the sets used by their response logic
+        """
+        return {"expertise": self._get_expertise_keywords()}
+    
     @abstractmethod 
-    def _generate_specialized_response(self, query: str, search_context: str = "") -> str:
+    def _generate_specialized_response(self, query: QueryContext, search_context: str = "") -> str:
         """Generate a specialized response for this agent type"""
         pass
     
-    def _generate_specialized_insights(self, query: str) -> List[str]:
+    def _generate_specialized_insights(self, query: QueryLike) -> List[str]:
         """Generate specialized insights - can be overridden by subclasses"""
         return [
             f"From a {self.expertise.lower()} perspective, this requires careful consideration",
@@ -115,7 +213,7 @@ class BaseAgent(ABC):
             f"This topic intersects with several areas within {self.expertise.lower()}"
         ]
     
-    def _generate_specialized_recommendations(self, query: str) -> List[str]:
+    def _generate_specialized_recommendations(self, query: QueryLike) -> List[str]:
         """Generate specialized recommendations - can be overridden by subclasses"""
         return [
             f"Consider consulting {self.expertise.lower()} best practices",
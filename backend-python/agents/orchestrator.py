@@ -1,24 +1,99 @@
 import asyncio
+import hashlib
+import json
+import logging
+import os
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, Tuple
+from utils.cache import TTLCache, SingleFlight
+from utils.mcp_search import mcp_search, SearchDecision
+from utils.query_context import QueryContext, QueryLike
+from utils.source_jobs import source_jobs
 from .base_agent import BaseAgent
-from .specialized.data_scientist import DataScientistAgent
-from .specialized.researcher import ResearcherAgent
-from .specialized.analyst import AnalystAgent
+from .registry import SpecialistRegistry
+from .relevance import RelevanceMatrix
+
+logger = logging.getLogger(__name__)
+
+# Deadlines (seconds) for specialist fan-out
+DEFAULT_SPECIALIST_TIMEOUT = float(os.getenv("SPECIALIST_TIMEOUT_SECONDS", "20"))
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("ANALYZE_REQUEST_TIMEOUT_SECONDS", "30"))
+
+# Number of distinct queries from one batch processed at the same time
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Specialist selection: "routing" (registry keyword routes) or "top_k" (relevance ranking)
+SPECIALIST_SELECTION = os.getenv("SPECIALIST_SELECTION", "routing")
+SPECIALIST_TOP_K = int(os.getenv("SPECIALIST_TOP_K", "3"))
+SPECIALIST_MIN_RELEVANCE = float(os.getenv("SPECIALIST_MIN_RELEVANCE", "0.0"))
+
+# Ask for every selected specialist's search decision in one LLM call
+BATCH_SEARCH_DECISIONS = os.getenv("BATCH_SEARCH_DECISIONS", "true").lower() == "true"
+
+# Cache of complete analysis results for repeated queries
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+RESULT_CACHE_MAX_SIZE = int(os.getenv("RESULT_CACHE_MAX_SIZE", "1024"))
+
+# How long a stream stays open after its summary for deferred sources (DEFER_SOURCES)
+SOURCE_STREAM_WAIT_SECONDS = float(os.getenv("SOURCE_STREAM_WAIT_SECONDS", "15"))
+
+def hash_user_profile(user_profile: Optional[Dict]) -> str:
+    """Stable hash of a user profile for use in dedupe/cache keys"""
+    if not user_profile:
+        return ""
+    encoded = json.dumps(user_profile, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
 
 class PythonOrchestratorAgent(BaseAgent):
-    def __init__(self):
+    def __init__(
+        self,
+        specialist_timeout: float = DEFAULT_SPECIALIST_TIMEOUT,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        registry: Optional[SpecialistRegistry] = None,
+        selection_strategy: str = SPECIALIST_SELECTION,
+        top_k: int = SPECIALIST_TOP_K,
+        min_relevance: float = SPECIALIST_MIN_RELEVANCE,
+        batch_search_decisions: bool = BATCH_SEARCH_DECISIONS
+    ):
         super().__init__("Python Orchestrator", "Advanced Analysis Coordination")
-        self.specialists = {
-            "data_scientist": DataScientistAgent(),
-            "researcher": ResearcherAgent(), 
-            "analyst": AnalystAgent()
-        }
+        self.specialist_timeout = specialist_timeout
+        self.request_timeout = request_timeout
+        self.result_cache = TTLCache(max_size=RESULT_CACHE_MAX_SIZE, ttl=RESULT_CACHE_TTL)
+        self._inflight_queries = SingleFlight()
+        self.registry = registry or SpecialistRegistry.from_environment()
+        # Name -> specialist; agents are imported on first use
+        self.specialists = self.registry
+        self.selection_strategy = selection_strategy
+        self.top_k = top_k
+        self.min_relevance = min_relevance
+        self.batch_search_decisions = batch_search_decisions
+        self._relevance_matrix: Optional[RelevanceMatrix] = None
+        self._relevance_version = -1
     
     def _get_expertise_keywords(self) -> List[str]:
         return ["analysis", "data", "research", "advanced", "python", "ml", "analytics"]
     
-    def _generate_specialized_response(self, query: str) -> str:
+    def _get_keyword_sets(self) -> Dict[str, List[str]]:
+        return {
+            **super()._get_keyword_sets(),
+            "complexity": [
+                "analyze", "compare", "predict", "model", "correlate",
+                "statistical", "trend", "pattern", "optimize", "recommend"
+            ],
+            "data": [
+                "data", "dataset", "numbers", "statistics", "metrics",
+                "measurement", "quantify", "calculate", "estimate"
+            ],
+            "research": [
+                "research", "study", "literature", "evidence", "theory",
+                "hypothesis", "methodology", "peer-reviewed", "academic"
+            ],
+            "modeling": ["model", "predict", "forecast"],
+            "comparison": ["compare", "versus", "difference"],
+            "optimization": ["optimize", "improve", "maximize", "minimize"]
+        }
+    
+    def _generate_specialized_response(self, query: QueryContext, search_context: str = "") -> str:
         return f"Advanced Python-based analysis coordinated across multiple specialist agents for: {query}"
         
     async def process_advanced_query(
@@ -28,22 +103,200 @@ class PythonOrchestratorAgent(BaseAgent):
         analysis_type: str = "standard"
     ) -> Dict[str, Any]:
         start_time = time.time()
+        # Normalized and tokenized once, shared by every layer below
+        context = QueryContext(query)
+        key = self._query_key(context, user_profile, analysis_type)
+        
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return {**cached, "processing_time": time.time() - start_time, "cached": True}
+        
+        # Concurrent identical requests share a single computation
+        result = await self._inflight_queries.do(
+            key, lambda: self._process_uncached(key, context, user_profile, analysis_type)
+        )
+        return dict(result)
+    
+    async def _process_uncached(
+        self,
+        key: Tuple[str, str, str],
+        query: QueryContext,
+        user_profile: Optional[Dict],
+        analysis_type: str
+    ) -> Dict[str, Any]:
+        start_time = time.time()
         
         # Analyze query complexity and requirements
         query_analysis = self._analyze_query_requirements(query, analysis_type)
         
         # Select appropriate specialists
-        active_specialists = self._select_specialists(query_analysis)
+        active_specialists = self._select_specialists(query)
+        
+        result = await self._execute_query(
+            query, user_profile, query_analysis, active_specialists, start_time
+        )
+        self._cache_result(key, result)
+        return result
+    
+    def _query_key(self, query: QueryLike, user_profile: Optional[Dict], analysis_type: str) -> Tuple[str, str, str]:
+        """Key identifying equivalent requests for deduplication and caching"""
+        return (QueryContext.of(query).normalized, analysis_type, hash_user_profile(user_profile))
+    
+    def _cache_result(self, key: Tuple[str, str, str], result: Dict[str, Any]):
+        # Partial results and results with a failed specialist are not cached,
+        # so a later request can complete them
+        if not result["partial"] and not result["failed_specialists"]:
+            self.result_cache.set(key, result)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the result cache and in-flight coalescing"""
+        return {
+            "result_cache": self.result_cache.stats(),
+            "single_flight": self._inflight_queries.stats()
+        }
+    
+    async def process_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process many queries in one call, sharing per-query work
+        
+        Identical queries (after normalization, with the same analysis_type and
+        user_profile) are processed once. Search decisions for every
+        (query, specialist) pair are requested through a single grouped LLM
+        pass instead of one call per specialist per query.
+        
+        Args:
+            requests: Dicts with "message" and optional "user_profile", "analysis_type"
+            
+        Returns:
+            One {"result": ...} or {"error": ...} entry per request, in input order
+        """
+        batch_start = time.time()
+        keys: List[Optional[Tuple[str, str, str]]] = []
+        errors: Dict[int, Exception] = {}
+        unique_requests: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        contexts: Dict[Tuple[str, str, str], QueryContext] = {}
+        results_by_key: Dict[Tuple[str, str, str], Any] = {}
+        for index, request in enumerate(requests):
+            try:
+                context = QueryContext(request["message"])
+                key = self._query_key(
+                    context,
+                    request.get("user_profile"),
+                    request.get("analysis_type", "standard")
+                )
+            except Exception as e:
+                keys.append(None)
+                errors[index] = e
+                continue
+            keys.append(key)
+            if key in unique_requests or key in results_by_key:
+                continue
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                results_by_key[key] = {**cached, "cached": True}
+            else:
+                unique_requests[key] = request
+                contexts[key] = context
+        
+        # Analyze and route each distinct query once; a query that fails
+        # planning is reported under its own key without failing the batch
+        try:
+            selections = dict(zip(contexts, self._select_specialists_batch(list(contexts.values()))))
+        except Exception:
+            selections = {}
+            for key, context in contexts.items():
+                try:
+                    selections[key] = self._select_specialists(context)
+                except Exception as e:
+                    results_by_key[key] = e
+        
+        plans = {}
+        for key, active_specialists in selections.items():
+            try:
+                query_analysis = self._analyze_query_requirements(
+                    contexts[key], unique_requests[key].get("analysis_type", "standard")
+                )
+            except Exception as e:
+                results_by_key[key] = e
+                continue
+            plans[key] = (query_analysis, active_specialists)
+        
+        # One grouped search-decision pass for all (query, specialist) pairs,
+        # bounded by the request deadline; unanswered pairs use the heuristics
+        pairs = [(key, name, specialist) 
+                 for key, (_, specialists) in plans.items() 
+                 for name, specialist in specialists.items()]
+        try:
+            decisions = await mcp_search.should_search_batch([
+                (contexts[key], specialist.expertise, specialist.name)
+                for key, _, specialist in pairs
+            ], timeout=self.request_timeout)
+        except Exception as e:
+            logger.warning(f"Batched search decision failed, specialists will decide individually: {e}")
+            decisions = []
+        search_decisions: Dict[Tuple[str, str, str], Dict[str, SearchDecision]] = {key: {} for key in plans}
+        for (key, name, _), decision in zip(pairs, decisions):
+            search_decisions[key][name] = decision
+        decision_time = time.time() - batch_start
+        
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+        
+        async def run(key):
+            request = unique_requests[key]
+            query_analysis, active_specialists = plans[key]
+            async with semaphore:
+                # Each query is charged for the shared planning pass, as a
+                # single query is charged for its own search decisions
+                result = await self._execute_query(
+                    contexts[key], request.get("user_profile"),
+                    query_analysis, active_specialists, time.time() - decision_time,
+                    search_decisions[key] or None
+                )
+            self._cache_result(key, result)
+            return result
+        
+        unique_keys = list(plans)
+        outcomes = await asyncio.gather(*(run(key) for key in unique_keys), return_exceptions=True)
+        results_by_key.update(zip(unique_keys, outcomes))
+        
+        logger.info(f"Processed batch of {len(requests)} queries ({len(unique_keys)} computed, {len(pairs)} search decisions)")
+        
+        batch_results = []
+        for index, key in enumerate(keys):
+            outcome = errors[index] if key is None else results_by_key[key]
+            if isinstance(outcome, Exception):
+                batch_results.append({"error": str(outcome)})
+            else:
+                batch_results.append({"result": outcome})
+        return batch_results
+    
+    async def _execute_query(
+        self,
+        query: QueryContext,
+        user_profile: Optional[Dict],
+        query_analysis: Dict[str, Any],
+        active_specialists: Dict[str, BaseAgent],
+        start_time: float,
+        search_decisions: Optional[Dict[str, SearchDecision]] = None
+    ) -> Dict[str, Any]:
+        deadline = start_time + self.request_timeout
+        
+        if search_decisions is None:
+            search_decisions = await self._start_search_decisions(query, active_specialists, deadline)
         
         # Coordinate specialist responses
         specialist_results = await self._coordinate_specialists(
-            query, active_specialists, user_profile
+            query, active_specialists, user_profile, deadline, search_decisions
         )
         
         # Synthesize final analysis
         synthesis = self._synthesize_analysis(specialist_results, query_analysis)
         
         processing_time = time.time() - start_time
+        timed_out = [name for name, results in specialist_results.items() 
+                     if results.get("timed_out")]
+        failed = [name for name, results in specialist_results.items()
+                  if results.get("error") and not results.get("timed_out")]
         
         return {
             "analysis": synthesis["primary_analysis"],
@@ -52,101 +305,295 @@ class PythonOrchestratorAgent(BaseAgent):
             "confidence": synthesis["confidence"],
             "processing_time": processing_time,
             "specialists_used": list(active_specialists.keys()),
-            "query_complexity": query_analysis["complexity"]
+            "query_complexity": query_analysis["complexity"],
+            "partial": bool(timed_out),
+            "timed_out_specialists": timed_out,
+            "failed_specialists": failed,
+            # Specialist name -> job id for GET /api/sources/{job_id} when sources are deferred
+            "sources_pending": {name: results["sources_pending"] for name, results in specialist_results.items()
+                                if results.get("sources_pending")},
+            "cached": False
         }
     
-    def _analyze_query_requirements(self, query: str, analysis_type: str) -> Dict[str, Any]:
-        complexity_indicators = [
-            "analyze", "compare", "predict", "model", "correlate",
-            "statistical", "trend", "pattern", "optimize", "recommend"
-        ]
-        
-        data_indicators = [
-            "data", "dataset", "numbers", "statistics", "metrics",
-            "measurement", "quantify", "calculate", "estimate"
-        ]
+    async def _decide_searches(
+        self,
+        query: QueryContext,
+        specialists: Dict[str, BaseAgent],
+        deadline: float
+    ) -> Dict[str, SearchDecision]:
+        """
+        Search decisions for all selected specialists from one structured LLM
+        call, bounded by the request deadline; specialists the call does not
+        answer in time get the keyword heuristics. An empty result leaves each
+        specialist to make its own decision.
+        """
+        if not self.batch_search_decisions or len(specialists) < 2:
+            return {}
         
-        research_indicators = [
-            "research", "study", "literature", "evidence", "theory",
-            "hypothesis", "methodology", "peer-reviewed", "academic"
-        ]
+        try:
+            decisions = await mcp_search.should_search_batch([
+                (query, specialist.expertise, specialist.name)
+                for specialist in specialists.values()
+            ], timeout=max(0, deadline - time.time()))
+            return dict(zip(specialists, decisions))
+        except Exception as e:
+            logger.warning(f"Batched search decision failed, specialists will decide individually: {e}")
+            return {}
+    
+    async def _start_search_decisions(
+        self,
+        query: QueryContext,
+        specialists: Dict[str, BaseAgent],
+        deadline: float
+    ) -> Dict[str, Any]:
+        """
+        Search decisions for the specialists, or in speculative mode one
+        task per specialist that resolves to its decision, so specialists
+        can start their searches while the batched call is still running
+        """
+        if not mcp_search.speculative_search:
+            return await self._decide_searches(query, specialists, deadline)
         
-        query_lower = query.lower()
+        # Shielded so a cancelled specialist does not cancel the shared call
+        batch = asyncio.ensure_future(self._decide_searches(query, specialists, deadline))
         
-        complexity_score = sum(1 for indicator in complexity_indicators 
-                             if indicator in query_lower) / len(complexity_indicators)
+        async def decision_for(name: str) -> Optional[SearchDecision]:
+            return (await asyncio.shield(batch)).get(name)
         
-        data_relevance = sum(1 for indicator in data_indicators 
-                           if indicator in query_lower) / len(data_indicators)
+        return {name: asyncio.ensure_future(decision_for(name)) for name in specialists}
+    
+    def _analyze_query_requirements(self, query: QueryLike, analysis_type: str) -> Dict[str, Any]:
+        keyword_hits = self.match_keywords(query)
+        keyword_sets = self.keyword_matcher.keyword_sets
         
-        research_relevance = sum(1 for indicator in research_indicators 
-                               if indicator in query_lower) / len(research_indicators)
+        def focus(name: str) -> float:
+            return len(keyword_hits[name]) / len(keyword_sets[name])
         
         return {
-            "complexity": complexity_score,
-            "data_focus": data_relevance,
-            "research_focus": research_relevance,
+            "complexity": focus("complexity"),
+            "data_focus": focus("data"),
+            "research_focus": focus("research"),
             "analysis_type": analysis_type,
-            "requires_modeling": any(term in query_lower for term in ["model", "predict", "forecast"]),
-            "requires_comparison": any(term in query_lower for term in ["compare", "versus", "difference"]),
-            "requires_optimization": any(term in query_lower for term in ["optimize", "improve", "maximize", "minimize"])
+            "requires_modeling": bool(keyword_hits["modeling"]),
+            "requires_comparison": bool(keyword_hits["comparison"]),
+            "requires_optimization": bool(keyword_hits["optimization"])
         }
     
-    def _select_specialists(self, query_analysis: Dict[str, Any]) -> Dict[str, BaseAgent]:
-        active_specialists = {}
+    @property
+    def relevance_matrix(self) -> RelevanceMatrix:
+        """Agent x term relevance matrix over every registered specialist, built from spec keywords"""
+        if self._relevance_matrix is None or self._relevance_version != self.registry.version:
+            self._relevance_matrix = RelevanceMatrix(
+                {name: self.registry.expertise_keywords(name) for name in self.registry}
+            )
+            self._relevance_version = self.registry.version
+        return self._relevance_matrix
+    
+    def _select_specialists(self, query: QueryLike) -> Dict[str, BaseAgent]:
+        return self._select_specialists_batch([query])[0]
+    
+    def _select_specialists_batch(self, queries: List[QueryLike]) -> List[Dict[str, BaseAgent]]:
+        """
+        Specialists for each query - routed by the registry's keyword index,
+        or the top_k most relevant specialists scored in one matrix product
+        """
+        if self.selection_strategy != "top_k":
+            return [{name: self.specialists[name] for name in self.registry.route(query)}
+                    for query in queries]
         
-        # Always include analyst for basic analysis
-        active_specialists["analyst"] = self.specialists["analyst"]
+        selections = []
+        for ranked in self.relevance_matrix.top_k_batch(queries, self.top_k, self.min_relevance):
+            # Fall back to the always-active specialists when nothing is relevant
+            names = [name for name, _ in ranked] or self.registry.always_active()
+            selections.append({name: self.specialists[name] for name in names})
+        return selections
+    
+    async def stream_advanced_query(
+        self,
+        query: str,
+        user_profile: Optional[Dict] = None,
+        analysis_type: str = "standard"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_advanced_query. Yields a query_analysis
+        event immediately, one specialist event per specialist as it finishes,
+        and a summary event with the synthesized analysis. Specialists whose
+        sources were deferred then get a sources event each as their sources
+        are ready.
+        """
+        start_time = time.time()
+        deadline = start_time + self.request_timeout
+        query = QueryContext(query)
         
-        # Add data scientist if data-focused or requires modeling
-        if (query_analysis["data_focus"] > 0.3 or 
-            query_analysis["requires_modeling"] or
-            query_analysis["complexity"] > 0.5):
-            active_specialists["data_scientist"] = self.specialists["data_scientist"]
-            
-        # Add researcher if research-focused or high complexity
-        if (query_analysis["research_focus"] > 0.2 or 
-            query_analysis["complexity"] > 0.6):
-            active_specialists["researcher"] = self.specialists["researcher"]
-            
-        return active_specialists
+        query_analysis = self._analyze_query_requirements(query, analysis_type)
+        active_specialists = self._select_specialists(query)
+        
+        yield {
+            "event": "query_analysis",
+            "query_complexity": query_analysis["complexity"],
+            "analysis_type": analysis_type,
+            "specialists": list(active_specialists.keys()),
+            "query_analysis": query_analysis
+        }
+        
+        search_decisions = await self._start_search_decisions(query, active_specialists, deadline)
+        
+        specialist_results = {}
+        async for name, results in self._iter_specialist_results(
+            query, active_specialists, user_profile, deadline, search_decisions
+        ):
+            specialist_results[name] = results
+            yield {
+                "event": "specialist",
+                "specialist": name,
+                "specialty": results.get("specialty"),
+                "analysis": results["analysis"],
+                "insights": results.get("insights", []),
+                "recommendations": results.get("recommendations", []),
+                "sources": results.get("sources", []),
+                "sources_pending": results.get("sources_pending"),
+                "confidence": results["confidence"],
+                "error": results.get("error"),
+                "timed_out": results.get("timed_out", False),
+                "elapsed": time.time() - start_time
+            }
+        
+        # Synthesize in selection order so the summary matches the batch endpoint
+        ordered_results = {name: specialist_results[name] for name in active_specialists}
+        synthesis = self._synthesize_analysis(ordered_results, query_analysis)
+        timed_out = [name for name, results in ordered_results.items() 
+                     if results.get("timed_out")]
+        
+        yield {
+            "event": "summary",
+            "analysis": synthesis["primary_analysis"],
+            "insights": synthesis["insights"],
+            "recommendations": synthesis["recommendations"],
+            "confidence": synthesis["confidence"],
+            "processing_time": time.time() - start_time,
+            "partial": bool(timed_out),
+            "timed_out_specialists": timed_out
+        }
+        
+        async def collect_sources(name: str, job_id: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+            return name, job_id, await source_jobs.wait(job_id, SOURCE_STREAM_WAIT_SECONDS)
+        
+        pending = [collect_sources(name, results["sources_pending"])
+                   for name, results in ordered_results.items() if results.get("sources_pending")]
+        for next_done in asyncio.as_completed(pending):
+            name, job_id, job = await next_done
+            yield {
+                "event": "sources",
+                "specialist": name,
+                "sources_pending": job_id,
+                "status": job["status"] if job else "expired",
+                "sources": job["sources"] if job else []
+            }
     
     async def _coordinate_specialists(
         self, 
-        query: str, 
+        query: QueryLike, 
         specialists: Dict[str, BaseAgent],
-        user_profile: Optional[Dict]
+        user_profile: Optional[Dict],
+        deadline: Optional[float] = None,
+        search_decisions: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Dict[str, Any]]:
+        completed = {}
+        async for name, results in self._iter_specialist_results(
+            query, specialists, user_profile, deadline, search_decisions
+        ):
+            completed[name] = results
         
-        tasks = []
+        # Preserve specialist selection order in the results
+        return {name: completed[name] for name in specialists}
+    
+    async def _iter_specialist_results(
+        self,
+        query: QueryLike,
+        specialists: Dict[str, BaseAgent],
+        user_profile: Optional[Dict],
+        deadline: Optional[float] = None,
+        search_decisions: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run all specialists concurrently and yield (name, result) in completion
+        order. Each specialist is bounded by specialist_timeout and the whole
+        fan-out by the request deadline; stragglers are cancelled and yielded
+        last with timed_out=True.
+        """
+        if deadline is None:
+            deadline = time.time() + self.request_timeout
+        search_decisions = search_decisions or {}
+        
+        tasks = {}
         for name, specialist in specialists.items():
-            task = self._get_specialist_analysis(specialist, query, user_profile)
-            tasks.append((name, task))
+            task = asyncio.create_task(asyncio.wait_for(
+                self._get_specialist_analysis(
+                    specialist, query, user_profile, search_decisions.get(name)
+                ),
+                timeout=self.specialist_timeout
+            ))
+            tasks[task] = name
         
-        results = {}
-        for name, task in tasks:
-            try:
-                results[name] = await task
-            except Exception as e:
-                results[name] = {
-                    "error": str(e),
-                    "analysis": "Analysis unavailable due to processing error",
-                    "confidence": 0.0
-                }
-                
-        return results
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield tasks[task], self._specialist_task_result(tasks[task], task)
+            
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in pending:
+                yield tasks[task], self._specialist_task_result(tasks[task], task)
+        finally:
+            # Consumer went away (e.g. client disconnected from a stream)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            for decision in search_decisions.values():
+                if isinstance(decision, asyncio.Future) and not decision.done():
+                    decision.cancel()
+    
+    def _specialist_task_result(self, name: str, task: asyncio.Task) -> Dict[str, Any]:
+        if task.cancelled() or isinstance(task.exception(), asyncio.TimeoutError):
+            logger.warning(f"Specialist {name} missed its deadline and was cancelled")
+            return {
+                "error": "Specialist timed out",
+                "timed_out": True,
+                "analysis": "Analysis unavailable: specialist exceeded its deadline",
+                "confidence": 0.0
+            }
+        if task.exception() is not None:
+            return {
+                "error": str(task.exception()),
+                "analysis": "Analysis unavailable due to processing error",
+                "confidence": 0.0
+            }
+        return task.result()
     
     async def _get_specialist_analysis(
         self, 
         specialist: BaseAgent, 
-        query: str, 
-        user_profile: Optional[Dict]
+        query: QueryLike, 
+        user_profile: Optional[Dict],
+        search_decision: Optional[Any] = None  # SearchDecision, or a task resolving to one
     ) -> Dict[str, Any]:
         
-        await asyncio.sleep(0.1)  # Simulate processing time
+        response = await specialist.generate_response(query, search_decision=search_decision)
         
         return {
-            "analysis": specialist.generate_response(query),
+            "analysis": response["content"],
+            "sources": response["sources"],
+            "sources_pending": response.get("sources_pending"),
+            "search_enhanced": response["search_enhanced"],
             "confidence": specialist.assess_relevance(query),
             "specialty": specialist.expertise,
             "insights": specialist.generate_insights(query),
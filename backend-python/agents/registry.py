@@ -0,0 +1,179 @@
+"""
+Specialist Registry
+
+Discovers specialist agents from config files and package entry points,
+imports each one lazily on first use, and routes queries through an
+inverted keyword -> specialist index so selection cost depends on the
+number of matched query terms rather than on the number of registered
+specialists.
+"""
+
+import importlib
+import json
+import logging
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.keyword_matcher import KeywordMatcher, normalize_text
+from utils.query_context import QueryContext, QueryLike
+from .base_agent import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specialists.json")
+ENTRY_POINT_GROUP = "expert_agentic_platform.specialists"
+
+@dataclass
+class SpecialistRoute:
+    """A specialist is routed a query when at least min_hits of these keywords match"""
+    keywords: List[str]
+    min_hits: int = 1
+
+@dataclass
+class SpecialistSpec:
+    """Registration record - enough to route without importing the agent"""
+    name: str
+    entry: str  # "package.module:ClassName"
+    routes: List[SpecialistRoute] = field(default_factory=list)
+    always_active: bool = False
+    expertise: List[str] = field(default_factory=list)  # Relevance-scoring keywords
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SpecialistSpec":
+        return cls(
+            name=data["name"],
+            entry=data["entry"],
+            routes=[SpecialistRoute(route["keywords"], route.get("min_hits", 1))
+                    for route in data.get("routes", [])],
+            always_active=data.get("always_active", False),
+            expertise=data.get("expertise", [])
+        )
+
+class SpecialistRegistry(Mapping):
+    """Name -> specialist mapping whose agents are instantiated on first access"""
+
+    def __init__(self):
+        self._specs: Dict[str, SpecialistSpec] = {}
+        self._instances: Dict[str, BaseAgent] = {}
+        self._order: Dict[str, int] = {}
+        self._matcher: Optional[KeywordMatcher] = None
+        self._index: Dict[str, List[Tuple[str, int]]] = {}
+        self._always_active: List[str] = []
+        self.version = 0  # Bumped on every registration so dependents can rebuild
+
+    @classmethod
+    def from_environment(cls) -> "SpecialistRegistry":
+        """
+        Registry with the built-in specialists, any extra config files listed
+        in SPECIALISTS_CONFIG (os.pathsep separated) and installed entry points
+        """
+        registry = cls()
+        registry.load_config(DEFAULT_CONFIG_PATH)
+        for path in filter(None, os.getenv("SPECIALISTS_CONFIG", "").split(os.pathsep)):
+            registry.load_config(path)
+        registry.load_entry_points()
+        return registry
+
+    def register(self, spec: SpecialistSpec):
+        """Register (or replace) a specialist"""
+        if spec.name not in self._order:
+            self._order[spec.name] = len(self._order)
+        self._specs[spec.name] = spec
+        self._instances.pop(spec.name, None)
+        self._matcher = None  # Rebuild index on next route()
+        self.version += 1
+
+    def load_config(self, path: str):
+        """Register every specialist listed in a JSON config file"""
+        with open(path) as config_file:
+            config = json.load(config_file)
+        for data in config.get("specialists", []):
+            self.register(SpecialistSpec.from_dict(data))
+        logger.info(f"Loaded {len(config.get('specialists', []))} specialist specs from {path}")
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP):
+        """
+        Register specs published by installed packages. Each entry point
+        resolves to a SpecialistSpec, a spec dict, or a list of either; the
+        agent classes themselves are still imported lazily.
+        """
+        for entry_point in entry_points(group=group):
+            try:
+                loaded = entry_point.load()
+                for item in loaded if isinstance(loaded, (list, tuple)) else [loaded]:
+                    self.register(item if isinstance(item, SpecialistSpec) else SpecialistSpec.from_dict(item))
+            except Exception as e:
+                logger.error(f"Failed to load specialist entry point {entry_point.name}: {e}")
+
+    def spec(self, name: str) -> SpecialistSpec:
+        return self._specs[name]
+
+    def always_active(self) -> List[str]:
+        """Specialists included in every query, in registration order"""
+        return [name for name, spec in self._specs.items() if spec.always_active]
+
+    def expertise_keywords(self, name: str) -> List[str]:
+        """
+        Expertise keywords declared in the spec. Specs that declare none fall
+        back to the agent's own keywords, which imports that one agent.
+        """
+        spec = self._specs[name]
+        return spec.expertise or self[name].keyword_matcher.keyword_sets["expertise"]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def __getitem__(self, name: str) -> BaseAgent:
+        agent = self._instances.get(name)
+        if agent is None:
+            spec = self._specs[name]
+            module_name, _, class_name = spec.entry.partition(":")
+            agent_class = getattr(importlib.import_module(module_name), class_name)
+            agent = agent_class()
+            self._instances[name] = agent
+            logger.info(f"Loaded specialist {name} from {spec.entry}")
+        return agent
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs  # Membership must not trigger an import
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def route(self, query: QueryLike) -> List[str]:
+        """
+        Names of the specialists routed this query, in registration order
+
+        One matcher scan finds the query's routing keywords; the inverted
+        index then maps each hit to the routes that contain it.
+        """
+        if self._matcher is None:
+            self._build_index()
+
+        hits = QueryContext.of(query).keyword_hits(self._matcher)["routing"]
+        route_hits: Dict[Tuple[str, int], int] = {}
+        for keyword in hits:
+            for route_key in self._index[keyword]:
+                route_hits[route_key] = route_hits.get(route_key, 0) + 1
+
+        selected = set(self._always_active)
+        for (name, route_number), count in route_hits.items():
+            if count >= self._specs[name].routes[route_number].min_hits:
+                selected.add(name)
+
+        return sorted(selected, key=self._order.__getitem__)
+
+    def _build_index(self):
+        self._index = {}
+        for name, spec in self._specs.items():
+            for route_number, route in enumerate(spec.routes):
+                for keyword in dict.fromkeys(normalize_text(keyword) for keyword in route.keywords):
+                    self._index.setdefault(keyword, []).append((name, route_number))
+        self._always_active = self.always_active()
+        self._matcher = KeywordMatcher({"routing": self._index.keys()})
@@ -0,0 +1,94 @@
+"""
+Vectorized Relevance Scoring
+
+Builds a sparse agent x term weight matrix from every agent's expertise
+keywords and scores queries against all agents with one sparse product,
+instead of calling assess_relevance on each agent in turn. Scores match
+BaseAgent.assess_relevance: matched keywords / total keywords * 2, capped
+at 1.0. The matrix is built from keyword lists alone, so agents that are
+never selected never have to be imported.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from utils.keyword_matcher import KeywordMatcher, normalize_text
+from utils.query_context import QueryContext, QueryLike
+
+class RelevanceMatrix:
+    """Relevance of every agent to a query (or batch of queries) in one product"""
+
+    def __init__(self, expertise: Dict[str, Iterable[str]]):
+        """
+        Args:
+            expertise: Agent name -> that agent's expertise keywords
+        """
+        self.agent_names: List[str] = list(expertise)
+        self.vocabulary: Dict[str, int] = {}
+
+        rows, cols, weights = [], [], []
+        for row, raw_keywords in enumerate(expertise.values()):
+            # Normalized and de-duplicated as the agent's own KeywordMatcher does
+            keywords = list(dict.fromkeys(normalize_text(keyword) for keyword in raw_keywords if keyword.strip()))
+            for keyword in keywords:
+                col = self.vocabulary.setdefault(keyword, len(self.vocabulary))
+                rows.append(row)
+                cols.append(col)
+                weights.append(2.0 / len(keywords))
+
+        self.weights = sparse.csr_matrix(
+            (weights, (rows, cols)),
+            shape=(len(self.agent_names), len(self.vocabulary)),
+            dtype=np.float64
+        )
+        self._matcher = KeywordMatcher({"terms": self.vocabulary.keys()})
+
+    def _query_matrix(self, queries: List[QueryLike]) -> sparse.csr_matrix:
+        """Binary query x term matrix of the vocabulary terms found in each query"""
+        rows, cols = [], []
+        for row, query in enumerate(queries):
+            for term in QueryContext.of(query).keyword_hits(self._matcher)["terms"]:
+                rows.append(row)
+                cols.append(self.vocabulary[term])
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(queries), len(self.vocabulary))
+        )
+
+    def score_batch(self, queries: List[QueryLike]) -> np.ndarray:
+        """Dense (queries x agents) relevance scores for a batch of queries"""
+        scores = (self._query_matrix(queries) @ self.weights.T).toarray()
+        return np.minimum(scores, 1.0)
+
+    def score(self, query: QueryLike) -> Dict[str, float]:
+        """Relevance of every agent to a single query"""
+        return dict(zip(self.agent_names, self.score_batch([query])[0].tolist()))
+
+    def top_k_batch(self, queries: List[QueryLike], k: int, min_score: float = 0.0) -> List[List[Tuple[str, float]]]:
+        """
+        Highest-scoring agents for each query, best first
+
+        Args:
+            queries: Queries to rank agents for
+            k: Maximum number of agents per query
+            min_score: Agents scoring at or below this are dropped
+
+        Returns:
+            List[List[Tuple[str, float]]]: (agent name, score) per query
+        """
+        scores = self.score_batch(queries)
+        k = min(k, len(self.agent_names))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        ranked = []
+        for row in scores:
+            candidates = np.argpartition(-row, k - 1)[:k]
+            candidates = candidates[np.argsort(-row[candidates], kind="stable")]
+            ranked.append([(self.agent_names[i], float(row[i])) for i in candidates if row[i] > min_score])
+        return ranked
+
+    def top_k(self, query: QueryLike, k: int, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        return self.top_k_batch([query], k, min_score)[0]
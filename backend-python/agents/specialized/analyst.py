@@ -1,4 +1,5 @@
-from typing import List
+from typing import Dict, List
+from utils.query_context import QueryContext, QueryLike
 from ..base_agent import BaseAgent
 
 class AnalystAgent(BaseAgent):
@@ -13,26 +14,34 @@ class AnalystAgent(BaseAgent):
             "process", "workflow", "improvement", "recommendations"
         ]
     
-    def _generate_specialized_response(self, query: str, search_context: str = "") -> str:
-        query_lower = query.lower()
+    def _get_keyword_sets(self) -> Dict[str, List[str]]:
+        return {
+            **super()._get_keyword_sets(),
+            "strategy": ["strategic", "business", "optimization"],
+            "performance": ["performance", "metrics", "kpi"],
+            "process": ["process", "workflow", "improvement"]
+        }
+    
+    def _generate_specialized_response(self, query: QueryContext, search_context: str = "") -> str:
+        keyword_hits = self.match_keywords(query)
         
         # Base response based on query type
         base_response = ""
         
-        if any(term in query_lower for term in ["strategic", "business", "optimization"]):
+        if keyword_hits["strategy"]:
             base_response = ("From a strategic analysis perspective, this requires understanding "
                            "stakeholder needs, current state assessment, and identification of "
                            "improvement opportunities. Consider both quantitative metrics and "
                            "qualitative factors. Develop actionable recommendations with clear "
                            "success criteria and implementation roadmaps.")
         
-        elif any(term in query_lower for term in ["performance", "metrics", "kpi"]):
+        elif keyword_hits["performance"]:
             base_response = ("Performance analysis should focus on key performance indicators (KPIs) "
                            "that align with organizational objectives. Establish baselines, set "
                            "realistic targets, and implement regular monitoring. Consider leading "
                            "and lagging indicators to provide comprehensive performance insights.")
         
-        elif any(term in query_lower for term in ["process", "workflow", "improvement"]):
+        elif keyword_hits["process"]:
             base_response = ("Process analysis requires mapping current workflows, identifying "
                            "bottlenecks and inefficiencies, and designing improved processes. "
                            "Use process mapping techniques, gather stakeholder feedback, and "
@@ -51,7 +60,7 @@ class AnalystAgent(BaseAgent):
         
         return base_response
     
-    def _generate_specialized_insights(self, query: str) -> List[str]:
+    def _generate_specialized_insights(self, query: QueryLike) -> List[str]:
         return [
             "Align analysis with strategic business objectives",
             "Consider both short-term impacts and long-term implications",
@@ -59,7 +68,7 @@ class AnalystAgent(BaseAgent):
             "Use data visualization to communicate complex insights effectively"
         ]
     
-    def _generate_specialized_recommendations(self, query: str) -> List[str]:
+    def _generate_specialized_recommendations(self, query: QueryLike) -> List[str]:
         return [
             "Define clear success metrics before beginning implementation",
             "Engage stakeholders early in the analysis process",
@@ -1,4 +1,5 @@
-from typing import List
+from typing import Dict, List
+from utils.query_context import QueryContext, QueryLike
 from ..base_agent import BaseAgent
 
 class DataScientistAgent(BaseAgent):
@@ -13,26 +14,34 @@ class DataScientistAgent(BaseAgent):
             "dataset", "feature", "training", "validation", "accuracy"
         ]
     
-    def _generate_specialized_response(self, query: str, search_context: str = "") -> str:
-        query_lower = query.lower()
+    def _get_keyword_sets(self) -> Dict[str, List[str]]:
+        return {
+            **super()._get_keyword_sets(),
+            "modeling": ["predict", "forecast", "model"],
+            "patterns": ["pattern", "trend", "analyze"],
+            "relationships": ["correlation", "relationship"]
+        }
+    
+    def _generate_specialized_response(self, query: QueryContext, search_context: str = "") -> str:
+        keyword_hits = self.match_keywords(query)
         
         # Base response based on query type
         base_response = ""
         
-        if any(term in query_lower for term in ["predict", "forecast", "model"]):
+        if keyword_hits["modeling"]:
             base_response = ("From a data science perspective, predictive modeling requires careful "
                            "feature selection, appropriate algorithm choice, and rigorous validation. "
                            "Consider ensemble methods, cross-validation, and feature engineering to "
                            "improve model performance. Always evaluate models using appropriate metrics "
                            "and test for overfitting.")
         
-        elif any(term in query_lower for term in ["pattern", "trend", "analyze"]):
+        elif keyword_hits["patterns"]:
             base_response = ("Data analysis should follow a systematic approach: exploratory data analysis, "
                            "statistical testing, and visualization. Look for patterns in the data distribution, "
                            "identify outliers, and consider both correlation and causation. Use appropriate "
                            "statistical tests and visualizations to communicate findings effectively.")
         
-        elif any(term in query_lower for term in ["correlation", "relationship"]):
+        elif keyword_hits["relationships"]:
             base_response = ("When examining relationships in data, distinguish between correlation and "
                            "causation. Use scatter plots, correlation matrices, and statistical tests "
                            "to identify relationships. Consider confounding variables and apply "
@@ -51,7 +60,7 @@ class DataScientistAgent(BaseAgent):
         
         return base_response
     
-    def _generate_specialized_insights(self, query: str) -> List[str]:
+    def _generate_specialized_insights(self, query: QueryLike) -> List[str]:
         return [
             "Data quality is crucial - invest time in cleaning and validation",
             "Always validate model assumptions and check for bias",
@@ -59,7 +68,7 @@ class DataScientistAgent(BaseAgent):
             "Visualize data distributions before applying statistical methods"
         ]
     
-    def _generate_specialized_recommendations(self, query: str) -> List[str]:
+    def _generate_specialized_recommendations(self, query: QueryLike) -> List[str]:
         return [
             "Start with exploratory data analysis to understand the data structure",
             "Use cross-validation to get reliable performance estimates",
@@ -1,4 +1,5 @@
-from typing import List
+from typing import Dict, List
+from utils.query_context import QueryContext, QueryLike
 from ..base_agent import BaseAgent
 
 class ResearcherAgent(BaseAgent):
@@ -13,25 +14,33 @@ class ResearcherAgent(BaseAgent):
             "quantitative", "experimental", "observational", "survey", "case study"
         ]
     
-    def _generate_specialized_response(self, query: str, search_context: str = "") -> str:
-        query_lower = query.lower()
+    def _get_keyword_sets(self) -> Dict[str, List[str]]:
+        return {
+            **super()._get_keyword_sets(),
+            "research": ["research", "study", "evidence"],
+            "literature": ["literature", "review", "sources"],
+            "methodology": ["methodology", "design", "approach"]
+        }
+    
+    def _generate_specialized_response(self, query: QueryContext, search_context: str = "") -> str:
+        keyword_hits = self.match_keywords(query)
         
         # Base response based on query type
         base_response = ""
         
-        if any(term in query_lower for term in ["research", "study", "evidence"]):
+        if keyword_hits["research"]:
             base_response = ("From a research methodology perspective, this requires a systematic approach "
                            "with clear research questions, appropriate study design, and rigorous data "
                            "collection methods. Consider the hierarchy of evidence, potential biases, "
                            "and ensure adequate sample sizes for statistical power.")
         
-        elif any(term in query_lower for term in ["literature", "review", "sources"]):
+        elif keyword_hits["literature"]:
             base_response = ("A comprehensive literature review should include systematic searching of "
                            "multiple databases, critical appraisal of evidence quality, and synthesis "
                            "of findings. Focus on peer-reviewed sources, consider publication bias, "
                            "and evaluate the strength of evidence using established frameworks.")
         
-        elif any(term in query_lower for term in ["methodology", "design", "approach"]):
+        elif keyword_hits["methodology"]:
             base_response = ("Research design should align with your research questions and objectives. "
                            "Consider whether quantitative, qualitative, or mixed methods are most "
                            "appropriate. Ensure proper controls, randomization where applicable, "
@@ -50,7 +59,7 @@ class ResearcherAgent(BaseAgent):
         
         return base_response
     
-    def _generate_specialized_insights(self, query: str) -> List[str]:
+    def _generate_specialized_insights(self, query: QueryLike) -> List[str]:
         return [
             "Systematic reviews provide stronger evidence than individual studies",
             "Consider both statistical and clinical significance in research findings",
@@ -58,7 +67,7 @@ class ResearcherAgent(BaseAgent):
             "Replication studies are crucial for validating research findings"
         ]
     
-    def _generate_specialized_recommendations(self, query: str) -> List[str]:
+    def _generate_specialized_recommendations(self, query: QueryLike) -> List[str]:
         return [
             "Conduct a comprehensive literature search using multiple databases",
             "Use established research frameworks and methodologies",
@@ -1,21 +1,48 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
+from contextlib import asynccontextmanager
 import uvicorn
+import json
 import os
 from dotenv import load_dotenv
 
 from agents.orchestrator import PythonOrchestratorAgent
 from agents.analytics import AnalyticsAgent
 from agents.ml_processor import MLProcessor
+from utils.mcp_search import mcp_search
+from utils.llm_client import llm_client, close_llm_client
+from utils.dynamic_sources import dynamic_source_generator
+from utils.source_jobs import source_jobs
 
 load_dotenv()
 
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "100"))
+MAX_SOURCE_WAIT_SECONDS = 30  # Longest long-poll on /api/sources/{job_id}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: probe MCP search availability in the background, never blocking boot
+    # (no server to probe with SEARCH_BACKEND=local), and open the HTTP session
+    # shared by every agent's source validation
+    if mcp_search.local_index is None:
+        mcp_search.start_background_probing()
+    await dynamic_source_generator.start()
+    source_jobs.start()
+    yield
+    # Shutdown: stop probing and background source jobs, close MCP sessions and release pooled connections
+    await mcp_search.close()
+    await source_jobs.close()
+    await dynamic_source_generator.close()
+    await close_llm_client()
+
 app = FastAPI(
     title="Expert Agentic Platform - Python Backend",
     description="Python backend for advanced analytics and ML processing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -35,6 +62,9 @@ class QueryRequest(BaseModel):
     user_profile: Optional[Dict] = None
     analysis_type: str = "standard"
 
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+
 class AnalyticsRequest(BaseModel):
     data: List[Dict]
     analysis_type: str = "descriptive"
@@ -61,7 +91,12 @@ async def health_check():
             "orchestrator": "active",
             "analytics": "active",
             "ml_processor": "active"
-        }
+        },
+        "mcp_search": (
+            mcp_search.health.snapshot() if mcp_search.local_index is None
+            else {"state": "local", "documents": len(mcp_search.local_index)}
+        ),
+        "llm": llm_client.health.snapshot()
     }
 
 @app.post("/api/analyze")
@@ -78,12 +113,84 @@ async def analyze_query(request: QueryRequest):
             "insights": result["insights"],
             "recommendations": result["recommendations"],
             "confidence": result["confidence"],
-            "processing_time": result["processing_time"]
+            "processing_time": result["processing_time"],
+            "partial": result["partial"],
+            "timed_out_specialists": result["timed_out_specialists"],
+            "sources_pending": result["sources_pending"],
+            "cached": result["cached"]
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze/batch")
+async def analyze_query_batch(request: BatchQueryRequest):
+    """Analyze many queries at once; results are returned in input order with per-item errors"""
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(request.queries)} queries (max {MAX_BATCH_QUERIES})"
+        )
+    
+    try:
+        batch_results = await orchestrator.process_batch([
+            {
+                "message": query.message,
+                "user_profile": query.user_profile,
+                "analysis_type": query.analysis_type
+            }
+            for query in request.queries
+        ])
+        
+        results = []
+        for index, item in enumerate(batch_results):
+            if "error" in item:
+                results.append({"index": index, "status": "error", "error": item["error"]})
+                continue
+            result = item["result"]
+            results.append({
+                "index": index,
+                "status": "ok",
+                "analysis": result["analysis"],
+                "insights": result["insights"],
+                "recommendations": result["recommendations"],
+                "confidence": result["confidence"],
+                "processing_time": result["processing_time"],
+                "partial": result["partial"],
+                "timed_out_specialists": result["timed_out_specialists"],
+                "sources_pending": result["sources_pending"],
+                "cached": result["cached"]
+            })
+        
+        return {"results": results}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/analyze/stream")
+async def analyze_query_stream(request: QueryRequest):
+    """
+    Stream the analysis as newline-delimited JSON: query_analysis first, then
+    one specialist event per specialist as it completes, then the summary.
+    """
+    async def event_stream():
+        try:
+            async for event in orchestrator.stream_advanced_query(
+                request.message,
+                request.user_profile,
+                request.analysis_type
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    
+    # X-Accel-Buffering stops nginx from holding events until the stream ends
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/analytics")
 async def run_analytics(request: AnalyticsRequest):
     try:
@@ -137,6 +244,33 @@ async def get_capabilities():
         "max_data_points": 10000
     }
 
+@app.get("/api/stats")
+async def get_stats():
+    """Cache hit/miss counters for tuning"""
+    return {
+        "orchestrator": orchestrator.cache_stats(),
+        "search": mcp_search.cache_stats(),
+        "sources": dynamic_source_generator.stats(),
+        "source_jobs": source_jobs.stats(),
+        "llm": llm_client.stats()
+    }
+
+@app.get("/api/sources/{job_id}")
+async def get_pending_sources(job_id: str, wait: float = 0.0):
+    """
+    Sources for a sources_pending handle. status is "pending" until the
+    background job finishes; wait long-polls for up to that many seconds.
+    """
+    job = await source_jobs.wait(job_id, min(max(wait, 0.0), MAX_SOURCE_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired sources_pending handle")
+    return {"sources_pending": job_id, **job}
+
+@app.get("/api/stats/hosts")
+async def get_host_stats():
+    """Per-host latency percentiles, failure rates and circuit state from source validation"""
+    return dynamic_source_generator.host_health.snapshot()
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
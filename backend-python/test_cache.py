@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Test result caching and single-flight coalescing
+"""
+
+import sys
+import os
+import asyncio
+import importlib
+import json
+import tempfile
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cache import TTLCache, SQLiteCache, SingleFlight
+from utils.mcp_search import MCPSearchClient, SearchDecision
+
+# utils/__init__ re-exports the mcp_search instance under the module's name
+mcp_search_module = importlib.import_module("utils.mcp_search")
+from agents.orchestrator import PythonOrchestratorAgent
+
+def test_ttl_cache_expires_and_evicts_lru():
+    """Entries expire after their TTL and the least recently used entry is evicted"""
+    cache = TTLCache(max_size=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1      # "b" is now least recently used
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+def test_single_flight_shares_one_computation():
+    """Concurrent callers for the same key run the function once"""
+    flight = SingleFlight()
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+    
+    async def run():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+    
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+def test_orchestrator_serves_normalized_repeats_from_cache():
+    """A repeated query (modulo case/whitespace) is answered from the cache"""
+    orchestrator = PythonOrchestratorAgent()
+    
+    async def run():
+        first = await orchestrator.process_advanced_query("What is a KPI?")
+        second = await orchestrator.process_advanced_query("  what is a kpi? ")
+        other_profile = await orchestrator.process_advanced_query("What is a KPI?", {"role": "cfo"})
+        return first, second, other_profile
+    
+    first, second, other_profile = asyncio.run(run())
+    
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["analysis"] == first["analysis"]
+    assert other_profile["cached"] is False
+    assert orchestrator.cache_stats()["result_cache"]["hits"] == 1
+
+def test_orchestrator_does_not_cache_results_with_failed_specialists():
+    """A result where a specialist raised is recomputed rather than served from the cache"""
+    orchestrator = PythonOrchestratorAgent()
+    orchestrator.batch_search_decisions = False
+    
+    class FailingSpecialist:
+        name = expertise = "failing"
+        
+        async def generate_response(self, query, use_search=True, search_decision=None):
+            raise RuntimeError("boom")
+        
+        def assess_relevance(self, query):
+            return 0.5
+    
+    orchestrator._select_specialists = lambda query: {"failing": FailingSpecialist()}
+    
+    async def run():
+        first = await orchestrator.process_advanced_query("What is a KPI?")
+        second = await orchestrator.process_advanced_query("What is a KPI?")
+        return first, second
+    
+    first, second = asyncio.run(run())
+    
+    assert first["failed_specialists"] == ["failing"]
+    assert second["cached"] is False
+    assert orchestrator.cache_stats()["result_cache"]["hits"] == 0
+
+def test_sqlite_cache_persists_and_prunes_lru():
+    """Entries survive reopening the database; pruning keeps the most recently used"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        cache = SQLiteCache(path, "test", max_size=2, ttl=60)
+        cache.set("a", {"value": 1})
+        cache.set("b", {"value": 2})
+        cache.set("c", {"value": 3})
+        changes = cache._conn.total_changes
+        assert cache.get("a") == {"value": 1}   # "b" is now least recently used
+        assert cache._conn.total_changes == changes  # Reads never take the write lock
+        cache.prune()
+        
+        reopened = SQLiteCache(path, "test", max_size=2, ttl=60)
+        assert reopened.get("a") == {"value": 1}
+        assert reopened.get("b") is None
+        assert len(reopened) == 2
+        assert SQLiteCache(path, "other").get("a") is None
+
+def test_search_decisions_are_cached_by_normalized_query():
+    """Repeated (query, expertise) pairs do not call the LLM again"""
+    calls = []
+    
+    async def fake_completion(**kwargs):
+        calls.append(kwargs)
+        content = json.dumps({"should_search": True, "reasoning": "r", "confidence": 0.9, "search_type": "fresh_data"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    
+    client = MCPSearchClient()
+    client.health.record_success()
+    original = mcp_search_module.create_chat_completion
+    mcp_search_module.create_chat_completion = fake_completion
+    try:
+        async def run():
+            first = await client.should_search("Latest LLM news", "Data Science", "Data Scientist")
+            second = await client.should_search("  latest llm NEWS ", "data science", "Data Scientist")
+            batch = await client.should_search_batch([
+                ("latest llm news", "Data Science", "Data Scientist"),
+                ("latest llm news", "Research", "Research Specialist")
+            ])
+            return first, second, batch
+        first, second, batch = asyncio.run(run())
+    finally:
+        mcp_search_module.create_chat_completion = original
+    
+    assert first == second
+    assert len(calls) == 2   # One single decision, one batch call for the uncached pair only
+    assert "Research Specialist" in calls[1]["messages"][1]["content"]
+    assert "Data Scientist" not in calls[1]["messages"][1]["content"]
+    assert client.cache_stats()["decision_cache"]["hits"] == 2
+
+def test_batched_decision_chunks_run_concurrently_within_timeout():
+    """Chunks go out together; chunks still running at the timeout use the fallback"""
+    client = MCPSearchClient()
+    client.health.record_success()
+    
+    async def fake_llm_batch(requests):
+        query = str(requests[0][0])
+        await asyncio.sleep(5 if query == "slow" else 0.2)
+        return {0: SearchDecision(True, "llm", 0.9, "comprehensive")}
+    
+    original_batch_size = mcp_search_module.SEARCH_DECISION_BATCH_SIZE
+    mcp_search_module.SEARCH_DECISION_BATCH_SIZE = 1
+    client._llm_batch_search_decisions = fake_llm_batch
+    try:
+        start = time.perf_counter()
+        decisions = asyncio.run(client.should_search_batch(
+            [(f"query {i}", "Research", "Research Specialist") for i in range(5)] +
+            [("slow", "Research", "Research Specialist")],
+            timeout=1.0
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        mcp_search_module.SEARCH_DECISION_BATCH_SIZE = original_batch_size
+    
+    assert elapsed < 2.0  # Not 5 x 0.2s in series, and not waiting for the slow chunk
+    assert [decision.reasoning for decision in decisions[:5]] == ["llm"] * 5
+    assert decisions[5].reasoning != "llm"
+
+def test_pooled_results_are_only_served_to_agents_they_fully_match():
+    """A shared generic term is not enough to serve one agent another agent's results"""
+    client = MCPSearchClient()
+    searched = []
+    
+    class FakeIndex:
+        def search_sync(self, query, max_results):
+            searched.append(query)
+            return [({"title": f"Business analysis case {i}", "url": f"https://example.com/{i}",
+                      "snippet": "Strategy for market growth"}, 1.0 - i / 10) for i in range(max_results)]
+    
+    client.local_index = FakeIndex()
+    
+    async def run():
+        await client.search("how to grow revenue", domain="business-analysis", expertise_keywords=["strategy", "market"])
+        # Shares only "analysis" with the pooled results: searches for itself
+        data_results = await client.search("how to grow revenue", domain="data-analysis", expertise_keywords=["statistics"])
+        # Every term appears in the pooled results: served from the pool
+        strategy_results = await client.search("how to grow revenue", domain="business", expertise_keywords=["strategy"])
+        return data_results, strategy_results
+    
+    data_results, strategy_results = asyncio.run(run())
+    
+    assert len(searched) == 2
+    assert "statistics" in searched[1]
+    assert len(strategy_results) == 5
+    assert client.refiltered_searches == 1
+
+if __name__ == "__main__":
+    test_ttl_cache_expires_and_evicts_lru()
+    test_single_flight_shares_one_computation()
+    test_orchestrator_serves_normalized_repeats_from_cache()
+    test_orchestrator_does_not_cache_results_with_failed_specialists()
+    test_sqlite_cache_persists_and_prunes_lru()
+    test_search_decisions_are_cached_by_normalized_query()
+    test_batched_decision_chunks_run_concurrently_within_timeout()
+    test_pooled_results_are_only_served_to_agents_they_fully_match()
+    print("✅ Cache tests passed")
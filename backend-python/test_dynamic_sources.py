@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Test source validation in the dynamic source generator
+"""
+
+import sys
+import os
+import asyncio
+import importlib
+import json
+import tempfile
+import time
+import pytest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.dynamic_sources import DynamicSourceGenerator, IncrementalSourceParser, ValidatedSource
+from utils.host_health import HostHealthIndex
+from utils.llm_client import llm_client
+
+dynamic_sources_module = importlib.import_module("utils.dynamic_sources")
+
+def suggestions(count):
+    return [
+        {"title": f"Source {i}", "url": f"https://host{i}.example.com/", "description": "Research data"}
+        for i in range(count)
+    ]
+
+def test_validation_is_concurrent_and_stops_at_max_sources():
+    """Fast hosts fill max_sources while slow probes are cancelled instead of awaited"""
+    generator = DynamicSourceGenerator()
+    delays = [0.1, 5.0, 0.1, 5.0, 0.1, 5.0]
+    cancelled = []
+
+    async def fake_validate_url(url):
+        index = int(url.split("host")[1].split(".")[0])
+        try:
+            await asyncio.sleep(delays[index])
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return True
+
+    generator.validate_url = fake_validate_url
+
+    async def run():
+        start = time.perf_counter()
+        sources = await generator.validate_suggested_sources(suggestions(6), "research data", "research", ["research"], 3)
+        return sources, time.perf_counter() - start
+
+    sources, elapsed = asyncio.run(run())
+
+    assert elapsed < 1.0  # Not 3 x 0.1 + 3 x 5 in sequence, nor waiting on the slow hosts
+    assert sorted(source.title for source in sources) == ["Source 0", "Source 2", "Source 4"]
+    assert len(cancelled) == 3
+
+def test_invalid_and_duplicate_suggestions_are_dropped():
+    """Only URLs that validate are returned, each once"""
+    generator = DynamicSourceGenerator()
+    probed = []
+
+    async def fake_validate_url(url):
+        probed.append(url)
+        return "host1" not in url
+
+    generator.validate_url = fake_validate_url
+    sources = asyncio.run(generator.validate_suggested_sources(
+        suggestions(3) + suggestions(1) + [{"title": "", "url": "https://untitled.example.com/"}],
+        "research data", "research", ["research"], 6
+    ))
+
+    assert sorted(source.url for source in sources) == ["https://host0.example.com/", "https://host2.example.com/"]
+    assert len(probed) == 3
+
+def test_http_session_is_shared_until_closed():
+    """Every validation reuses one pooled session; close() releases it"""
+    generator = DynamicSourceGenerator()
+
+    async def run():
+        await generator.start()
+        session = generator.session
+        assert not await generator.validate_url("https://")  # Rejected before any request
+        assert generator.session is session
+        assert session.connector.limit_per_host > 0
+        await generator.close()
+        return session
+
+    session = asyncio.run(run())
+    assert session.closed
+    assert generator.session is None
+
+def test_url_cache_has_separate_ttls_and_is_shared_through_sqlite():
+    """Failures expire sooner than successes; a second worker sees the first one's results"""
+    original = (dynamic_sources_module.SOURCE_URL_CACHE_PATH, dynamic_sources_module.SOURCE_URL_CACHE_VALID_TTL,
+                dynamic_sources_module.SOURCE_URL_CACHE_INVALID_TTL)
+    with tempfile.TemporaryDirectory() as directory:
+        dynamic_sources_module.SOURCE_URL_CACHE_PATH = os.path.join(directory, "cache.sqlite3")
+        dynamic_sources_module.SOURCE_URL_CACHE_VALID_TTL = 60
+        dynamic_sources_module.SOURCE_URL_CACHE_INVALID_TTL = 0.05
+        try:
+            worker, other_worker = DynamicSourceGenerator(), DynamicSourceGenerator()
+            worker._cache_url_result("https://good.example.com/", True)
+            worker._cache_url_result("https://bad.example.com/", False)
+
+            assert other_worker.url_cache.get("https://good.example.com/") is True
+            assert other_worker.url_cache.get("https://bad.example.com/") is False
+            time.sleep(0.06)
+            assert other_worker.url_cache.get("https://bad.example.com/") is None
+            assert other_worker.url_cache.get("https://good.example.com/") is True
+        finally:
+            (dynamic_sources_module.SOURCE_URL_CACHE_PATH, dynamic_sources_module.SOURCE_URL_CACHE_VALID_TTL,
+             dynamic_sources_module.SOURCE_URL_CACHE_INVALID_TTL) = original
+
+def test_host_health_adapts_timeouts_skips_failing_and_trusts_reliable_hosts():
+    """Per-host statistics drive the timeout, the circuit and trust"""
+    index = HostHealthIndex(failure_threshold=2, cooldown=60, trust_after=3, min_samples=3, min_timeout=0.1)
+    for _ in range(3):
+        index.record("fast.example.com", 0.05, reachable=True, valid=True)
+    assert index.timeout_for("fast.example.com", 5.0) == pytest.approx(0.15)
+    assert index.timeout_for("new.example.com", 5.0) == 5.0
+    assert index.is_trusted("fast.example.com")
+
+    index.record("fast.example.com", 0.05, reachable=True, valid=False)  # A 404 ends the trust streak
+    assert not index.is_trusted("fast.example.com")
+
+    for _ in range(2):
+        index.record("dead.example.com", 5.0, reachable=False, error="timeout")
+    assert index.should_skip("dead.example.com")
+    assert not index.should_skip("fast.example.com")
+
+    snapshot = index.snapshot()
+    assert snapshot["hosts"]["dead.example.com"]["failure_rate"] == 1.0
+    assert snapshot["hosts"]["dead.example.com"]["state"] == "open"
+    assert snapshot["hosts"]["fast.example.com"]["p50_seconds"] == 0.05
+    assert (snapshot["skipped_requests"], snapshot["trusted_requests"]) == (1, 1)
+
+def test_validate_url_skips_failing_hosts_and_trusts_reliable_ones_without_requests():
+    """Neither an open-circuit host nor a trusted host gets a HEAD request"""
+    generator = DynamicSourceGenerator()
+    for _ in range(generator.host_health.failure_threshold):
+        generator.host_health.record("dead.example.com", 5.0, reachable=False)
+    for _ in range(generator.host_health.trust_after):
+        generator.host_health.record("docs.example.com", 0.1, reachable=True, valid=True)
+
+    async def run():
+        try:
+            return (await generator.validate_url("https://dead.example.com/page"),
+                    await generator.validate_url("https://docs.example.com/new-page"))
+        finally:
+            await generator.close()
+
+    assert asyncio.run(run()) == (False, True)
+    assert generator.session is None  # No request was made
+    assert generator.url_cache.get("https://dead.example.com/page") is None  # Retried after the cooldown
+
+def test_host_slots_limit_concurrency_and_are_dropped_when_idle():
+    """A host's slots cap its concurrent validations and are not kept once unused"""
+    generator = DynamicSourceGenerator()
+    active, peak = [0], [0]
+
+    async def hold(host):
+        async with generator._host_slot(host):
+            busy = host == "busy.example.com"
+            active[0] += busy
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= busy
+
+    async def run():
+        await asyncio.gather(*(hold("busy.example.com") for _ in range(10)),
+                             *(hold(f"host{i}.example.com") for i in range(20)))
+
+    asyncio.run(run())
+    assert peak[0] == min(10, dynamic_sources_module.SOURCE_VALIDATION_PER_HOST)
+    assert generator._host_semaphores == {} and generator._host_users == {}
+
+def test_sources_are_cached_per_content_hash_and_domain():
+    """Repeated and concurrent identical responses generate sources once per domain"""
+    generator = DynamicSourceGenerator()
+    generations = []
+
+    async def fake_generate(response, agent_domain, max_sources):
+        generations.append(agent_domain)
+        await asyncio.sleep(0.05)
+        return [ValidatedSource("Source", "https://example.com/", 0.9, "general_knowledge", agent_domain)]
+
+    generator._generate_sources_internal = fake_generate
+
+    async def run():
+        concurrent = await asyncio.gather(*(
+            generator.generate_dynamic_sources("Templated answer", "data-science") for _ in range(3)
+        ))
+        repeat = await generator.generate_dynamic_sources("Templated answer", "data-science")
+        other_domain = await generator.generate_dynamic_sources("Templated answer", "research")
+        return concurrent, repeat, other_domain
+
+    concurrent, repeat, other_domain = asyncio.run(run())
+
+    assert generations == ["data-science", "research"]
+    assert concurrent[0] == concurrent[1] == concurrent[2] == repeat
+    assert other_domain[0].domain == "research"
+    assert generator.stats()["source_single_flight"]["coalesced"] == 2
+
+def test_stale_cached_sources_are_revalidated_in_the_background():
+    """A stale entry is served immediately, then URLs that no longer validate are dropped"""
+    generator = DynamicSourceGenerator()
+    original = dynamic_sources_module.SOURCE_CACHE_REVALIDATE_SECONDS
+    dynamic_sources_module.SOURCE_CACHE_REVALIDATE_SECONDS = 0
+
+    async def fake_generate(response, agent_domain, max_sources):
+        return [ValidatedSource(f"Source {i}", f"https://host{i}.example.com/", 0.9, "general_knowledge", agent_domain)
+                for i in range(2)]
+
+    async def fake_validate_url(url, use_cache=True):
+        return "host0" in url
+
+    generator._generate_sources_internal = fake_generate
+    generator.validate_url = fake_validate_url
+
+    async def run():
+        first = await generator.generate_dynamic_sources("Templated answer", "research")
+        stale = await generator.generate_dynamic_sources("Templated answer", "research")
+        await asyncio.gather(*generator._revalidations.values())
+        dynamic_sources_module.SOURCE_CACHE_REVALIDATE_SECONDS = original
+        fresh = await generator.generate_dynamic_sources("Templated answer", "research")
+        return first, stale, fresh
+
+    try:
+        first, stale, fresh = asyncio.run(run())
+    finally:
+        dynamic_sources_module.SOURCE_CACHE_REVALIDATE_SECONDS = original
+
+    assert len(first) == len(stale) == 2
+    assert [source.url for source in fresh] == ["https://host0.example.com/"]
+    assert generator.revalidated_entries == 1
+
+def test_incremental_parser_yields_each_source_as_it_completes():
+    """Objects come out as soon as their closing brace arrives, whatever the chunking"""
+    text = '```json\n{"sources": [{"title": "A {tricky} \\"one\\"", "url": "https://a.example.com/"}, {"title": "B", "url": "https://b.example.com/"}]}\n```'
+    parser = IncrementalSourceParser()
+    completed_at = []
+    for position, char in enumerate(text):
+        for item in parser.feed(char):
+            completed_at.append((position, item["title"]))
+
+    assert [title for _, title in completed_at] == ['A {tricky} "one"', "B"]
+    assert completed_at[0][0] < text.index('{"title": "B"')
+
+def test_streamed_suggestions_validate_while_generating_and_stop_early():
+    """Validation overlaps generation, and the stream is closed once max_sources validate"""
+    generator = DynamicSourceGenerator()
+    events = []
+
+    async def fake_stream(**kwargs):
+        try:
+            yield '{"sources": ['
+            for i in range(6):
+                await asyncio.sleep(0.1)
+                events.append(f"streamed {i}")
+                yield json.dumps({"title": f"Source {i}", "url": f"https://host{i}.example.com/"}) + ", "
+            yield "]}"
+        finally:
+            events.append("closed")
+
+    async def fake_validate_url(url, use_cache=True):
+        events.append(f"validating {url}")
+        return True
+
+    generator.validate_url = fake_validate_url
+    saved = (llm_client.provider, dynamic_sources_module.stream_chat_completion)
+    llm_client.provider, dynamic_sources_module.stream_chat_completion = object(), fake_stream
+    try:
+        sources = asyncio.run(generator.generate_relevant_knowledge_sources("response", "research", ["research"], 2))
+    finally:
+        llm_client.provider, dynamic_sources_module.stream_chat_completion = saved
+
+    assert [source.title for source in sources] == ["Source 0", "Source 1"]
+    assert events.index("validating https://host0.example.com/") < events.index("streamed 1")
+    assert events[-1] == "closed" and "streamed 3" not in events
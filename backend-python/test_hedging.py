@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test request hedging: the first answer wins, the extra-load cap and releasing losers
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.hedging import Hedger
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    """A call still running at the hedge delay is duplicated; the faster duplicate wins"""
+    hedger = Hedger(enabled=True, max_extra_load=1.0, min_samples=0)
+    delays = [1.0, 0.01]
+    cancelled = []
+
+    async def call():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    result = asyncio.run(hedger.run(call, delay=0.05))
+    stats = hedger.stats()
+
+    assert result == 0.01
+    assert cancelled == [1.0]
+    assert stats["hedges_fired"] == 1
+    assert stats["hedges_won"] == 1
+
+def test_hedges_are_capped_and_off_by_default():
+    """Hedges stay within max_extra_load, and a disabled hedger never sends one"""
+    async def slow_call():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run_calls(hedger, count):
+        for _ in range(count):
+            assert await hedger.run(slow_call, delay=0.01) == "ok"
+
+    capped = Hedger(enabled=True, max_extra_load=0.25, min_samples=0)
+    asyncio.run(run_calls(capped, 8))
+    assert capped.fired == 2
+    assert capped.over_budget == 6
+
+    disabled = Hedger(enabled=False)
+    asyncio.run(run_calls(disabled, 3))
+    assert disabled.fired == 0
+    assert disabled.stats()["calls"] == 3
+
+def test_losing_result_is_discarded():
+    """A duplicate that also succeeded is handed to discard(), never leaked"""
+    hedger = Hedger(enabled=True, max_extra_load=1.0, min_samples=0)
+    discarded = []
+
+    async def run():
+        answered = asyncio.Event()
+        results = iter(["primary", "hedge"])
+
+        async def call():
+            result = next(results)
+            await answered.wait()
+            return result
+
+        async def discard(result):
+            discarded.append(result)
+
+        # Both calls finish in the same tick, after the hedge has been sent
+        asyncio.get_running_loop().call_later(0.05, answered.set)
+        return await hedger.run(call, delay=0.01, discard=discard)
+
+    assert asyncio.run(run()) == "primary"
+    assert discarded == ["hedge"]
+    assert hedger.won == 0
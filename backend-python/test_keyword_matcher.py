@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test the compiled multi-keyword matcher used for agent routing
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.keyword_matcher import KeywordMatcher
+from agents.specialized.data_scientist import DataScientistAgent
+from agents.specialized.analyst import AnalystAgent
+
+def test_reports_hits_for_every_set_in_one_scan():
+    """Overlapping keyword sets are all reported from a single scan"""
+    matcher = KeywordMatcher({
+        "modeling": ["model", "predict"],
+        "data": ["data", "dataset"],
+        "ml": ["machine learning", "ml"]
+    })
+    
+    hits = matcher.scan("Predict  churn with a Machine   Learning model on our dataset")
+    
+    assert hits["modeling"] == {"model", "predict"}
+    assert hits["data"] == {"data", "dataset"}
+    assert hits["ml"] == {"machine learning"}
+
+def test_keywords_must_start_at_word_boundary():
+    """Keywords no longer match inside other words"""
+    matcher = KeywordMatcher({"terms": ["ml", "data", "model"]})
+    
+    assert matcher.scan("update the html template") == {"terms": set()}
+    assert matcher.scan("ML-based modeling") == {"terms": {"ml", "model"}}
+
+def test_matcher_is_compiled_once_per_agent_class():
+    """Instances share a class-level matcher; classes do not share with each other"""
+    first, second = DataScientistAgent(), DataScientistAgent()
+    
+    assert first.keyword_matcher is second.keyword_matcher
+    assert first.keyword_matcher is not AnalystAgent().keyword_matcher
+    assert first.match_keywords("forecast the trend")["modeling"] == {"forecast"}
+
+if __name__ == "__main__":
+    test_reports_hits_for_every_set_in_one_scan()
+    test_keywords_must_start_at_word_boundary()
+    test_matcher_is_compiled_once_per_agent_class()
+    print("✅ Keyword matcher tests passed")
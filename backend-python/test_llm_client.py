@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the shared LLM client: retries, circuit breaker, rate limiting and the fake provider
+"""
+
+import sys
+import os
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from utils.llm_client import FakeChatProvider, LLMClient, LLMOverloadedError, LLMUnavailableError, TokenBucket
+
+class FlakyProvider:
+    """Fails the first `failures` calls with a timeout, then answers"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise TimeoutError("provider timed out")
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="{}"))], usage=usage)
+
+def test_retryable_errors_are_retried_with_backoff():
+    """A transient failure is retried and the call's tokens and latency are recorded"""
+    provider = FlakyProvider(failures=2)
+    client = LLMClient(provider, max_retries=2, retry_base_delay=0.01)
+
+    response = asyncio.run(client.chat(model="m", messages=[]))
+    stats = client.stats()
+
+    assert response.choices[0].message.content == "{}"
+    assert provider.calls == 3
+    assert (stats["calls"], stats["retries"], stats["failures"]) == (1, 2, 0)
+    assert stats["tokens"] == {"m": {"prompt_tokens": 10, "completion_tokens": 5}}
+    assert stats["latency_p50_seconds"] is not None
+
+def test_circuit_opens_after_repeated_failures():
+    """Once the threshold is reached calls fail fast without reaching the provider"""
+    provider = FlakyProvider(failures=100)
+    client = LLMClient(provider, max_retries=0, failure_threshold=2, circuit_cooldown=60)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                await client.chat(model="m", messages=[])
+        with pytest.raises(LLMUnavailableError):
+            await client.chat(model="m", messages=[])
+
+    asyncio.run(run())
+    assert provider.calls == 2
+    assert client.stats()["short_circuited"] == 1
+    assert client.health.state == "open"
+
+def test_queueing_timeouts_do_not_open_the_circuit():
+    """Calls that time out waiting for a local slot leave a healthy provider's circuit closed"""
+    client = LLMClient(FakeChatProvider(latency=0.3), max_concurrency=1, timeout=0.5, failure_threshold=3)
+
+    messages = [{"role": "user", "content": "Is a search needed?"}]
+
+    async def run():
+        calls = [client.chat(model="m", messages=messages) for _ in range(10)]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        await client.chat(model="m", messages=messages)  # Still reaches the provider
+        return results
+
+    results = asyncio.run(run())
+    overloaded = [result for result in results if isinstance(result, LLMOverloadedError)]
+
+    # The first call answers; the second gets the slot with too little budget
+    # left for the provider; the rest never get a slot
+    assert len(overloaded) == 8
+    assert client.stats()["queue_timeouts"] == 8
+    assert client.health.state != "open"
+
+def test_token_bucket_limits_the_call_rate():
+    """Calls beyond the burst wait for tokens to refill"""
+    bucket = TokenBucket(rate=20, burst=1)
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(run()) >= 0.18  # Four refills at 20 tokens per second
+    assert bucket.waits >= 4
+
+def test_fake_provider_serves_decisions_and_streamed_sources():
+    """The offline provider answers both prompt shapes, streamed or not"""
+    client = LLMClient(FakeChatProvider(latency=0.01))
+
+    async def run():
+        decision = await client.chat(model="m", messages=[{"role": "user", "content": 'Is the "latest" data needed? "should_search"'}])
+        deltas = [delta async for delta in client.stream_chat(model="m", messages=[{"role": "user", "content": '{"sources": []}'}])]
+        return decision, "".join(deltas)
+
+    decision, streamed = asyncio.run(run())
+
+    assert json.loads(decision.choices[0].message.content)["should_search"] is True
+    assert len(json.loads(streamed)["sources"]) == 6
+    assert client.stats()["tokens"]["m"]["completion_tokens"] > 0
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the offline BM25 search backend and its on-disk index
+"""
+
+import sys
+import os
+import asyncio
+import importlib
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import local_search
+from utils.local_search import LocalSearchIndex
+from utils.mcp_search import MCPSearchClient
+
+DOCUMENTS = [
+    {"title": "Vector databases explained", "url": "https://example.com/vectors",
+     "snippet": "How vector databases index embeddings", "text": "Approximate nearest neighbour search over embeddings."},
+    {"title": "Relational database tuning", "url": "https://example.com/sql",
+     "snippet": "Indexes and query plans", "text": "B-tree indexes speed up relational database queries."},
+    {"title": "Gardening in spring", "url": "https://example.com/garden",
+     "snippet": "Planting tomatoes", "text": "Tomatoes need sun and water."},
+]
+
+def test_bm25_ranks_matching_documents_and_persists():
+    """Best match first, scores populated, and the index reopens from disk"""
+    with tempfile.TemporaryDirectory() as path:
+        index = LocalSearchIndex(path)
+        assert index.add_documents(DOCUMENTS) == 3
+
+        results = index.search_sync("vector database embeddings", max_results=2)
+        assert [document["url"] for document, _ in results] == ["https://example.com/vectors", "https://example.com/sql"]
+        assert results[0][1] > results[1][1] > 0
+        assert index.search_sync("quantum chromodynamics") == []
+
+        reopened = LocalSearchIndex(path)
+        assert len(reopened) == 3
+        assert reopened.search_sync("vector database embeddings", max_results=2) == results
+
+def test_incremental_ingestion_and_segment_merge():
+    """New documents land in new segments without a rebuild; duplicates are skipped; segments merge"""
+    with tempfile.TemporaryDirectory() as path:
+        index = LocalSearchIndex(path)
+        index.add_documents(DOCUMENTS[:1])
+        assert index.add_documents(DOCUMENTS) == 2  # The first URL is already indexed
+        assert index.stats()["segments"] == 2
+
+        for i in range(local_search.MAX_SEGMENTS - 1):  # One past MAX_SEGMENTS triggers the merge
+            index.add_documents([{"title": f"Tomato variety {i}", "url": f"https://example.com/tomato/{i}"}])
+        assert index.stats()["segments"] == 1
+        assert len(index) == 2 + local_search.MAX_SEGMENTS
+
+        top_urls = [document["url"] for document, _ in LocalSearchIndex(path).search_sync("tomatoes sun", 1)]
+        assert top_urls == ["https://example.com/garden"]
+
+def test_uncommitted_documents_do_not_shift_later_ids():
+    """Documents left by an ingestion that never committed are dropped by the next one"""
+    with tempfile.TemporaryDirectory() as path:
+        LocalSearchIndex(path).add_documents(DOCUMENTS[:1])
+        with open(os.path.join(path, "docs.jsonl"), "a") as docs_file:
+            docs_file.write('{"title": "Orphan", "url": "https://example.com/orphan", "snippet": ""}\n')
+
+        index = LocalSearchIndex(path)
+        index.add_documents([{"title": "bravo", "url": "https://example.com/bravo"}])
+        reopened = LocalSearchIndex(path)
+
+        assert [document["url"] for document, _ in reopened.search_sync("bravo")] == ["https://example.com/bravo"]
+        assert len(reopened) == 2
+
+def test_client_serves_search_from_local_backend():
+    """SEARCH_BACKEND=local answers search() offline, with relevance scores"""
+    mcp_search_module = importlib.import_module("utils.mcp_search")
+    with tempfile.TemporaryDirectory() as path:
+        LocalSearchIndex(path).add_documents(DOCUMENTS)
+        original = mcp_search_module.SEARCH_BACKEND, mcp_search_module.LOCAL_SEARCH_INDEX_PATH
+        mcp_search_module.SEARCH_BACKEND, mcp_search_module.LOCAL_SEARCH_INDEX_PATH = "local", path
+        try:
+            client = MCPSearchClient()
+        finally:
+            mcp_search_module.SEARCH_BACKEND, mcp_search_module.LOCAL_SEARCH_INDEX_PATH = original
+
+        async def run():
+            try:
+                return await client.search("relational query plans", max_results=2)
+            finally:
+                await client.close()
+
+        results = asyncio.run(run())
+        assert client.is_available
+        assert results[0].url == "https://example.com/sql"
+        assert results[0].relevance_score > 0
+        assert client.cache_stats()["local_index"]["documents"] == 3
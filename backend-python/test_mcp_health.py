@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test background MCP availability probing and its circuit breaker
+"""
+
+import sys
+import os
+import asyncio
+import importlib
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.health import HealthTracker
+from utils.mcp_search import MCPSearchClient
+
+mcp_search_module = importlib.import_module("utils.mcp_search")
+FAKE_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "fake_mcp_server.py")
+
+def test_health_state_machine_opens_and_recovers():
+    """Failures degrade then open the circuit; one success closes it again"""
+    health = HealthTracker(failure_threshold=2, open_cooldown=0)
+    assert health.state == "unknown" and not health.is_available
+
+    health.record_success()
+    assert health.state == "healthy" and health.is_available
+
+    health.record_failure("boom")
+    assert health.state == "degraded" and health.is_available
+    health.record_failure("boom")
+    assert health.state == "open" and not health.is_available
+    assert health.next_check_delay(60) == 0  # Re-probe after the cooldown, not the interval
+
+    health.record_success()
+    assert health.state == "healthy"
+    assert health.consecutive_failures == 0
+
+def test_never_healthy_dependency_is_not_available():
+    health = HealthTracker(failure_threshold=3)
+    health.record_failure("missing")
+    assert health.state == "unknown" and not health.is_available
+
+def test_client_construction_does_not_probe():
+    """Creating the client is instant; availability is unknown until a probe runs"""
+    client = MCPSearchClient()
+    assert client.health.state == "unknown"
+    assert client._probe_task is None
+    assert client.is_available is False  # Outside an event loop: no probe started
+
+def test_background_probe_tracks_server_availability():
+    """The probe marks a launchable server healthy and a missing one unavailable"""
+    original = mcp_search_module.MCP_SEARCH_COMMAND
+    try:
+        mcp_search_module.MCP_SEARCH_COMMAND = f"{sys.executable} {FAKE_SERVER}"
+        client = MCPSearchClient()
+
+        async def run_probes():
+            client.start_background_probing()
+            await asyncio.sleep(0)
+            task = client._probe_task
+            for _ in range(100):
+                if client.health.state != "unknown":
+                    break
+                await asyncio.sleep(0.05)
+            state = client.health.state
+            await client.close()
+            return task, state
+
+        task, state = asyncio.run(run_probes())
+        assert state == "healthy"
+        assert task.cancelled() and client._probe_task is None
+
+        client.session_pool.command = ["definitely-not-an-mcp-server"]
+        assert asyncio.run(client.probe()) is False
+        assert client.health.state == "degraded"
+        assert client.is_available
+    finally:
+        mcp_search_module.MCP_SEARCH_COMMAND = original
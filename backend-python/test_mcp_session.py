@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test pooled, multiplexed MCP search sessions against the fake MCP server
+"""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.mcp_session import MCPSessionPool
+from utils.mcp_search import MCPSearchClient
+
+FAKE_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils", "fake_mcp_server.py")
+
+def test_concurrent_calls_are_multiplexed_over_few_sessions():
+    """Many concurrent searches share the pool's long-lived sessions"""
+    pool = MCPSessionPool(f"{sys.executable} {FAKE_SERVER} --latency 0.3", size=2)
+
+    async def run():
+        try:
+            await pool.health_check()
+            start = time.perf_counter()
+            results = await asyncio.gather(*(
+                pool.call_tool("search", {"query": f"query {i}", "max_results": 2})
+                for i in range(20)
+            ))
+            return results, time.perf_counter() - start, pool.stats()
+        finally:
+            await pool.close()
+
+    results, elapsed, stats = asyncio.run(run())
+
+    assert len(results) == 20
+    assert all(f"query {i}" in result["content"][0]["text"] for i, result in enumerate(results))
+    assert elapsed < 2.0  # In flight together, not 20 x 0.3s one after another
+    assert stats["sessions_started"] <= 2
+    assert stats["failures"] == 0
+
+def test_scale_out_does_not_block_calls_on_live_sessions():
+    """A slow-starting extra session does not hold up calls the live session can serve"""
+    pool = MCPSessionPool(f"{sys.executable} {FAKE_SERVER} --latency 0.1 --startup-delay 1.5", size=2)
+
+    async def run():
+        try:
+            await pool.health_check(timeout=5)
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                pool.call_tool("search", {"query": f"query {i}", "max_results": 1}) for i in range(3)
+            ))
+            elapsed = time.perf_counter() - start
+            return elapsed, len(pool._starting)
+        finally:
+            await pool.close()
+
+    elapsed, starting = asyncio.run(run())
+    assert elapsed < 1.0
+    assert starting == 1  # The second session was still starting in the background
+
+def test_dead_session_is_replaced():
+    pool = MCPSessionPool(f"{sys.executable} {FAKE_SERVER}", size=1)
+
+    async def run():
+        try:
+            await pool.health_check()
+            pool._sessions[0].process.kill()
+            await pool._sessions[0].process.wait()
+            result = await pool.call_tool("search", {"query": "after restart", "max_results": 1})
+            return result, pool.stats()
+        finally:
+            await pool.close()
+
+    result, stats = asyncio.run(run())
+    assert "after restart" in result["content"][0]["text"]
+    assert stats["sessions_started"] == 2
+    assert stats["sessions_replaced"] == 1
+
+def test_client_search_parses_results():
+    client = MCPSearchClient()
+    client.session_pool = MCPSessionPool(f"{sys.executable} {FAKE_SERVER}", size=1)
+    client.health.record_success()
+
+    async def run():
+        try:
+            return await client.search("vector databases", "data-science", ["ml", "statistics"], max_results=3)
+        finally:
+            await client.close()
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert results[0].title == "Result 1 for vector databases data science ml statistics"
+    assert results[0].url.startswith("https://example.com/")
+
+def test_search_results_are_cached_coalesced_and_refiltered():
+    """Identical searches share one call; narrower agent queries reuse pooled results"""
+    client = MCPSearchClient()
+    client.session_pool = MCPSessionPool(f"{sys.executable} {FAKE_SERVER} --latency 0.2", size=2)
+    client.health.record_success()
+
+    async def run():
+        try:
+            concurrent = await asyncio.gather(*(
+                client.search("churn drivers", "business-analysis", ["strategy", "kpi"], max_results=5)
+                for _ in range(3)
+            ))
+            repeat = await client.search("Churn  drivers", "business-analysis", ["strategy", "kpi"], max_results=3)
+            # Fake results echo the full search query, so they mention "strategy"
+            narrower = await client.search("churn drivers", "", ["strategy"], max_results=3)
+            return concurrent, repeat, narrower
+        finally:
+            await client.close()
+
+    concurrent, repeat, narrower = asyncio.run(run())
+    stats = client.cache_stats()
+
+    assert concurrent[0] == concurrent[1] == concurrent[2]
+    assert repeat == concurrent[0][:3]
+    assert len(narrower) == 3 and all("strategy" in result.snippet.lower() + result.title.lower() for result in narrower)
+    assert client.session_pool.stats()["calls"] == 1
+    assert stats["result_single_flight"]["coalesced"] == 2
+    assert stats["refiltered_searches"] == 1
+
+def test_speculative_search_overlaps_decision_and_is_cancelled_when_rejected():
+    """Time-sensitive queries search while the decision is made; rejected searches are discarded"""
+    from agents.specialized.analyst import AnalystAgent
+    from utils.mcp_search import mcp_search, SearchDecision
+
+    agent = AnalystAgent()
+    async def no_sources(response):
+        return []
+    agent.generate_dynamic_sources = no_sources
+
+    async def slow_decision(query, expertise_area, agent_name):
+        await asyncio.sleep(0.3)
+        approved = "approve" in str(query)
+        return SearchDecision(approved, "test", 0.9, "fresh_data" if approved else "none")
+
+    saved = (mcp_search.session_pool, mcp_search.should_search, mcp_search.speculative_search, dict(mcp_search.speculation))
+    mcp_search.session_pool = MCPSessionPool(f"{sys.executable} {FAKE_SERVER} --latency 0.3", size=2)
+    mcp_search.should_search = slow_decision
+    mcp_search.speculative_search = True
+    mcp_search.health.record_success()
+    try:
+        async def run():
+            try:
+                await mcp_search.session_pool.health_check()
+                start = time.perf_counter()
+                approved = await agent.generate_response("approve the latest churn figures")
+                elapsed = time.perf_counter() - start
+                rejected = await agent.generate_response("reject the latest churn figures")
+                return approved, elapsed, rejected
+            finally:
+                await mcp_search.session_pool.close()
+
+        approved, elapsed, rejected = asyncio.run(run())
+        speculation = dict(mcp_search.speculation)
+    finally:
+        mcp_search.session_pool, mcp_search.should_search, mcp_search.speculative_search, mcp_search.speculation = saved
+
+    assert approved["search_enhanced"] and elapsed < 0.55  # Not 0.3s decision + 0.3s search
+    assert not rejected["search_enhanced"]
+    assert speculation["used"] == 1 and speculation["wasted"] == 1
+    assert speculation["saved_seconds"] > 0.2
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test concurrent specialist fan-out and deadlines in the Python orchestrator
+"""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.orchestrator import PythonOrchestratorAgent
+from utils.mcp_search import mcp_search, SearchDecision
+
+class DelayedSpecialist:
+    """Minimal specialist stand-in whose response takes a fixed time"""
+    
+    def __init__(self, name: str, delay: float):
+        self.name = name
+        self.expertise = name
+        self.delay = delay
+    
+    async def generate_response(self, query, use_search=True, search_decision=None):
+        await asyncio.sleep(self.delay)
+        return {"content": f"{self.name} analysis", "sources": [], "search_enhanced": False, "source_count": 0}
+    
+    def assess_relevance(self, query):
+        return 0.5
+    
+    def generate_insights(self, query):
+        return [f"{self.name} insight"]
+    
+    def generate_recommendations(self, query):
+        return [f"{self.name} recommendation"]
+
+def test_specialists_run_concurrently():
+    """Wall time should track the slowest specialist, not the sum"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=5)
+    specialists = {f"s{i}": DelayedSpecialist(f"s{i}", 0.2) for i in range(3)}
+    
+    start = time.time()
+    results = asyncio.run(orchestrator._coordinate_specialists("query", specialists, None))
+    elapsed = time.time() - start
+    
+    assert list(results) == ["s0", "s1", "s2"]
+    assert all(r["analysis"] == f"{name} analysis" for name, r in results.items())
+    assert elapsed < 0.5, f"specialists ran sequentially ({elapsed:.2f}s)"
+
+def test_stragglers_are_cancelled_and_marked():
+    """Specialists past their deadline are reported as timed out"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=0.3, request_timeout=5)
+    specialists = {
+        "fast": DelayedSpecialist("fast", 0.05),
+        "slow": DelayedSpecialist("slow", 2.0)
+    }
+    
+    start = time.time()
+    results = asyncio.run(orchestrator._coordinate_specialists("query", specialists, None))
+    
+    assert time.time() - start < 1.0
+    assert results["fast"]["analysis"] == "fast analysis"
+    assert results["slow"]["timed_out"] is True
+    assert results["slow"]["confidence"] == 0.0
+
+def test_request_deadline_returns_partial_result():
+    """The overall deadline bounds the request and marks it partial"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=0.3)
+    orchestrator.specialists = {
+        "analyst": DelayedSpecialist("analyst", 0.05),
+        "data_scientist": DelayedSpecialist("data_scientist", 2.0),
+        "researcher": DelayedSpecialist("researcher", 2.0)
+    }
+    
+    start = time.time()
+    result = asyncio.run(orchestrator.process_advanced_query(
+        "Predict trends from research evidence and study data"
+    ))
+    
+    assert time.time() - start < 1.0
+    assert result["partial"] is True
+    assert "analyst analysis" in result["analysis"]
+    assert set(result["timed_out_specialists"]) == {"data_scientist", "researcher"}
+
+def test_stream_emits_specialists_in_completion_order():
+    """Fast specialists are streamed before slow ones, summary comes last"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=5)
+    orchestrator.specialists = {
+        "analyst": DelayedSpecialist("analyst", 0.3),
+        "data_scientist": DelayedSpecialist("data_scientist", 0.05),
+        "researcher": DelayedSpecialist("researcher", 0.15)
+    }
+    
+    async def collect():
+        return [event async for event in orchestrator.stream_advanced_query(
+            "Predict trends from research evidence and study data"
+        )]
+    
+    events = asyncio.run(collect())
+    
+    assert [e["event"] for e in events] == ["query_analysis", "specialist", "specialist", "specialist", "summary"]
+    assert [e["specialist"] for e in events[1:4]] == ["data_scientist", "researcher", "analyst"]
+    assert events[-1]["partial"] is False
+
+def test_batch_dedupes_and_groups_search_decisions():
+    """Normalized duplicates run once, decisions come from one grouped call, order is kept"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=5)
+    orchestrator.specialists = {
+        "analyst": DelayedSpecialist("analyst", 0.01),
+        "data_scientist": DelayedSpecialist("data_scientist", 0.01),
+        "researcher": DelayedSpecialist("researcher", 0.01)
+    }
+    
+    batch_calls = []
+    async def fake_should_search_batch(requests, timeout=None):
+        batch_calls.append(requests)
+        return [SearchDecision(False, "test", 1.0, "none") for _ in requests]
+    
+    executed = []
+    original_execute = orchestrator._execute_query
+    async def tracking_execute(query, *args, **kwargs):
+        executed.append(str(query))
+        if str(query) == "fail":
+            raise RuntimeError("boom")
+        return await original_execute(query, *args, **kwargs)
+    
+    original_batch = mcp_search.should_search_batch
+    mcp_search.should_search_batch = fake_should_search_batch
+    orchestrator._execute_query = tracking_execute
+    try:
+        results = asyncio.run(orchestrator.process_batch([
+            {"message": "What is a trend?"},
+            {"message": "fail"},
+            {"message": "  what IS a   trend? "},
+            {"text": "malformed item"},
+        ]))
+    finally:
+        mcp_search.should_search_batch = original_batch
+    
+    assert len(batch_calls) == 1
+    assert sorted(executed) == ["What is a trend?", "fail"]
+    assert results[0] == results[2]
+    assert "result" in results[0]
+    assert results[1] == {"error": "boom"}
+    assert set(results[3]) == {"error"}  # A bad item fails alone, not the batch
+
+def test_single_query_makes_one_batched_search_decision():
+    """All selected specialists get their decision from one grouped call"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=5)
+    received = {}
+    
+    class RecordingSpecialist(DelayedSpecialist):
+        async def generate_response(self, query, use_search=True, search_decision=None):
+            received[self.name] = search_decision
+            return await super().generate_response(query, use_search, search_decision)
+    
+    orchestrator.specialists = {
+        name: RecordingSpecialist(name, 0.01) for name in ["analyst", "data_scientist", "researcher"]
+    }
+    
+    batch_calls = []
+    async def fake_should_search_batch(requests, timeout=None):
+        batch_calls.append(requests)
+        return [SearchDecision(True, agent_name, 0.9, "fresh_data") for _, _, agent_name in requests]
+    
+    original_batch = mcp_search.should_search_batch
+    mcp_search.should_search_batch = fake_should_search_batch
+    try:
+        asyncio.run(orchestrator.process_advanced_query("Predict trends from research evidence and study data"))
+    finally:
+        mcp_search.should_search_batch = original_batch
+    
+    assert len(batch_calls) == 1
+    assert {name: decision.reasoning for name, decision in received.items()} == {
+        "analyst": "analyst", "data_scientist": "data_scientist", "researcher": "researcher"
+    }
+
+def test_slow_batched_search_decision_is_bounded_by_deadline():
+    """A batched decision call that outlives the request deadline is cut off at the deadline"""
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=0.3)
+    orchestrator.specialists = {
+        name: DelayedSpecialist(name, 0.01) for name in ["analyst", "data_scientist", "researcher"]
+    }
+    
+    timeouts = []
+    async def slow_should_search_batch(requests, timeout=None):
+        timeouts.append(timeout)
+        await asyncio.sleep(min(2.0, timeout if timeout is not None else 2.0))
+        return [SearchDecision(False, "fallback", 0.5, "none") for _ in requests]
+    
+    original_batch = mcp_search.should_search_batch
+    mcp_search.should_search_batch = slow_should_search_batch
+    try:
+        start = time.time()
+        result = asyncio.run(orchestrator.process_advanced_query("Predict trends from research evidence and study data"))
+        elapsed = time.time() - start
+    finally:
+        mcp_search.should_search_batch = original_batch
+    
+    assert len(timeouts) == 1
+    assert timeouts[0] is not None and timeouts[0] <= 0.3
+    assert elapsed < 1.0
+    assert result["partial"]
+
+if __name__ == "__main__":
+    test_specialists_run_concurrently()
+    test_stragglers_are_cancelled_and_marked()
+    test_request_deadline_returns_partial_result()
+    test_stream_emits_specialists_in_completion_order()
+    test_batch_dedupes_and_groups_search_decisions()
+    test_single_query_makes_one_batched_search_decision()
+    test_slow_batched_search_decision_is_bounded_by_deadline()
+    print("✅ Orchestrator concurrency tests passed")
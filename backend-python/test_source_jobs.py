@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test deferred source generation on the bounded background queue
+"""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.mcp_search import SearchDecision
+from utils.source_jobs import SourceJobQueue, source_jobs
+
+def test_deferred_sources_do_not_hold_up_the_response():
+    """The content returns at once with a sources_pending handle that later resolves"""
+    from agents.specialized.analyst import AnalystAgent
+
+    agent = AnalystAgent()
+    async def slow_sources(response):
+        await asyncio.sleep(0.5)
+        return ["Source - https://example.com/"]
+    agent.generate_dynamic_sources = slow_sources
+
+    async def run():
+        try:
+            start = time.perf_counter()
+            response = await agent.generate_response(
+                "analyze churn", search_decision=SearchDecision(False, "test", 0.9, "none"), defer_sources=True
+            )
+            elapsed = time.perf_counter() - start
+            pending = source_jobs.get(response["sources_pending"])["status"]
+            job = await source_jobs.wait(response["sources_pending"], timeout=2)
+            return response, elapsed, pending, job
+        finally:
+            await source_jobs.close()
+
+    response, elapsed, pending, job = asyncio.run(run())
+
+    assert elapsed < 0.3
+    assert response["sources"] == []
+    assert pending == "pending"
+    assert job == {"status": "ready", "sources": ["Source - https://example.com/"]}
+
+def test_non_streaming_result_lists_pending_source_handles():
+    """Deferred specialists' job ids are returned for the follow-up endpoint"""
+    from agents.orchestrator import PythonOrchestratorAgent
+
+    class DeferringSpecialist:
+        def __init__(self, name):
+            self.name = self.expertise = name
+
+        async def generate_response(self, query, use_search=True, search_decision=None):
+            return {"content": "analysis", "sources": [], "sources_pending": f"job-{self.name}",
+                    "search_enhanced": False, "source_count": 0}
+
+        def assess_relevance(self, query):
+            return 0.5
+
+        def generate_insights(self, query):
+            return []
+
+        def generate_recommendations(self, query):
+            return []
+
+    orchestrator = PythonOrchestratorAgent(specialist_timeout=5, request_timeout=5)
+    orchestrator.batch_search_decisions = False
+    orchestrator.specialists = {name: DeferringSpecialist(name) for name in ["analyst", "researcher"]}
+
+    result = asyncio.run(orchestrator.process_advanced_query("Summarize research evidence on churn"))
+
+    assert result["specialists_used"]
+    assert result["sources_pending"] == {name: f"job-{name}" for name in result["specialists_used"]}
+
+def test_full_queue_applies_backpressure_then_rejects():
+    """Submitters wait for room up to put_timeout, then are turned away"""
+    queue = SourceJobQueue(max_size=1, workers=1, put_timeout=0.1)
+
+    async def slow_job():
+        await asyncio.sleep(0.3)
+        return []
+
+    async def run():
+        try:
+            running = await queue.submit(slow_job)  # Taken by the worker
+            await asyncio.sleep(0)
+            queued = await queue.submit(slow_job)   # Fills the queue
+            start = time.perf_counter()
+            rejected = await queue.submit(slow_job)
+            waited = time.perf_counter() - start
+            await queue.wait(queued, timeout=2)
+            return running, queued, rejected, waited, queue.stats()
+        finally:
+            await queue.close()
+
+    running, queued, rejected, waited, stats = asyncio.run(run())
+
+    assert running and queued and rejected is None
+    assert waited >= 0.1
+    assert (stats["completed"], stats["rejected"]) == (2, 1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test specialist discovery, lazy loading and indexed routing
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.registry import SpecialistRegistry, SpecialistSpec, SpecialistRoute, DEFAULT_CONFIG_PATH
+from agents.relevance import RelevanceMatrix
+
+def test_specialists_are_imported_on_first_use():
+    """Routing works from specs alone; agents are instantiated only when accessed"""
+    registry = SpecialistRegistry()
+    registry.load_config(DEFAULT_CONFIG_PATH)
+    
+    assert registry.route("Find research evidence for this theory") == ["analyst", "researcher"]
+    assert not any(registry.is_loaded(name) for name in registry)
+    
+    assert registry["researcher"].name == "Research Specialist"
+    assert registry.is_loaded("researcher")
+    assert not registry.is_loaded("analyst")
+
+def test_config_file_registers_additional_specialists():
+    """Extra config files add specialists that route by their own keywords"""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as config_file:
+        json.dump({"specialists": [{
+            "name": "finance",
+            "entry": "agents.specialized.analyst:AnalystAgent",
+            "routes": [{"keywords": ["portfolio", "interest rate"], "min_hits": 1}]
+        }]}, config_file)
+    
+    try:
+        registry = SpecialistRegistry()
+        registry.load_config(DEFAULT_CONFIG_PATH)
+        registry.load_config(config_file.name)
+    finally:
+        os.unlink(config_file.name)
+    
+    assert "finance" in registry
+    assert registry.route("How do interest rates affect my portfolio?") == ["analyst", "finance"]
+
+def test_route_requires_min_hits_per_route():
+    """A route only fires once enough of its keywords match"""
+    registry = SpecialistRegistry()
+    registry.register(SpecialistSpec(
+        name="stats",
+        entry="agents.specialized.data_scientist:DataScientistAgent",
+        routes=[SpecialistRoute(["mean", "median", "variance"], min_hits=2)]
+    ))
+    
+    assert registry.route("what is the median") == []
+    assert registry.route("median versus mean") == ["stats"]
+
+def test_relevance_matrix_matches_per_agent_scoring():
+    """One sparse product gives the same scores as assess_relevance on each agent"""
+    registry = SpecialistRegistry()
+    registry.load_config(DEFAULT_CONFIG_PATH)
+    matrix = RelevanceMatrix({name: registry.expertise_keywords(name) for name in registry})
+    assert not any(registry.is_loaded(name) for name in registry)  # Built from specs alone
+    agents = {name: registry[name] for name in registry}
+    queries = [
+        "Predict data trends with machine learning",
+        "Strategic business KPI analysis",
+        "Update the html template"
+    ]
+    
+    scores = matrix.score_batch(queries)
+    
+    for row, query in enumerate(queries):
+        for col, agent in enumerate(agents.values()):
+            assert abs(scores[row, col] - agent.assess_relevance(query)) < 1e-9
+    assert [name for name, _ in matrix.top_k(queries[0], k=2)] == ["data_scientist", "analyst"]
+    assert matrix.top_k(queries[2], k=2) == []
+
+if __name__ == "__main__":
+    test_specialists_are_imported_on_first_use()
+    test_config_file_registers_additional_specialists()
+    test_route_requires_min_hits_per_route()
+    test_relevance_matrix_matches_per_agent_scoring()
+    print("✅ Specialist registry tests passed")
@@ -0,0 +1,274 @@
+"""
+Caching Utilities
+
+In-memory TTL/LRU cache with hit/miss accounting, an SQLite-backed
+variant whose entries survive restarts and are shared by every worker on
+the host, plus single-flight coalescing so concurrent callers asking for
+the same key share one computation instead of each running it.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class SQLiteCache:
+    """
+    TTL/LRU cache persisted in an SQLite file
+
+    Values must be JSON-serializable and keys are strings. Several caches
+    can share one file under different namespaces. Hit/miss counters are
+    per process; size is read from the shared table.
+
+    Reads never write: access times of hit keys are collected in memory and
+    written in one batch alongside the next write, and expired rows are
+    left for pruning. The busy timeout is short, so a locked database costs
+    a cache miss or a skipped write instead of stalling the event loop.
+    """
+
+    PRUNE_INTERVAL = 100  # Writes between expiry/LRU pruning passes
+    TOUCH_FLUSH_SIZE = 1000  # Pending access-time updates that force a flush
+    BUSY_TIMEOUT = 0.05  # Seconds to wait for another worker's write lock
+
+    def __init__(self, path: str, namespace: str, max_size: int = 10000, ttl: float = 3600.0):
+        self.path = path
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self._writes = 0
+        self._touched: Dict[str, float] = {}  # key -> last access time not yet written
+
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Concurrent readers across workers
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed_at)"
+        )
+        # Schema setup above may wait for other workers; requests must not
+        self._conn.execute(f"PRAGMA busy_timeout = {int(self.BUSY_TIMEOUT * 1000)}")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            # A busy or broken cache must never fail the request
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            row = None
+        if row is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = row
+        if expires_at <= now:
+            self.expirations += 1  # Row is removed by the next prune
+            self.misses += 1
+            return default
+
+        self._touched[key] = now
+        if len(self._touched) >= self.TOUCH_FLUSH_SIZE:
+            self._flush_touches()
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        self._touched.pop(key, None)
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), now + (self.ttl if ttl is None else ttl), now)
+            )
+            self._writes += 1
+            self._flush_touches()
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self.prune()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {e}")
+
+    def _flush_touches(self):
+        """Write pending access times in one statement batch; dropped if the database is busy"""
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            self._conn.executemany(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                [(accessed_at, self.namespace, key) for key, accessed_at in touched.items()]
+            )
+        except sqlite3.Error as e:
+            logger.debug(f"Cache access-time update failed for {self.namespace}: {e}")
+
+    def delete(self, key: str):
+        self._touched.pop(key, None)
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def clear(self):
+        self._touched.clear()
+        self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def prune(self):
+        """Drop expired entries, then the least recently used beyond max_size"""
+        self._flush_touches()
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time())
+        )
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache_entries WHERE namespace = ?"
+            " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_size)
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations
+        }
+
+def create_cache(namespace: str, max_size: int, ttl: float, path: Optional[str] = None) -> Union[TTLCache, SQLiteCache]:
+    """
+    SQLite-backed cache when a path is configured, in-memory otherwise.
+    Falls back to memory if the database cannot be opened.
+    """
+    if path:
+        try:
+            return SQLiteCache(path, namespace, max_size=max_size, ttl=ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open cache database {path}: {e} - using in-memory cache for {namespace}")
+    return TTLCache(max_size=max_size, ttl=ttl)
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one in-flight task"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() for key, or join the call already in flight for that key
+
+        The computation runs as its own task, so a caller being cancelled does
+        not cancel the work for the other callers waiting on it.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every waiter was cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced
+        }
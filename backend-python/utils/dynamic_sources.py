@@ -8,15 +8,111 @@ search result URLs that are verified to work.
 
 import asyncio
 import aiohttp
+import contextlib
+import hashlib
 import json
 import logging
+import os
 import re
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+import time
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Dict, Optional, Tuple, Union
+from dataclasses import dataclass, asdict
 from urllib.parse import urlparse
+from .cache import SingleFlight, create_cache
+from .host_health import HostHealthIndex
+from .hedging import Hedger
+from .llm_client import llm_client, stream_chat_completion
 
 logger = logging.getLogger(__name__)
 
+# Suggested sources are validated concurrently: at most this many HEAD
+# requests in flight per worker, and at most SOURCE_VALIDATION_PER_HOST
+# to any one host
+SOURCE_VALIDATION_CONCURRENCY = int(os.getenv("SOURCE_VALIDATION_CONCURRENCY", "16"))
+SOURCE_VALIDATION_PER_HOST = int(os.getenv("SOURCE_VALIDATION_PER_HOST", "2"))
+MAX_SUGGESTED_SOURCES = 8  # Suggestions considered per response
+
+_validation_semaphore = asyncio.Semaphore(SOURCE_VALIDATION_CONCURRENCY)
+
+# The validation HTTP session lives as long as the app and is shared by
+# every agent, keeping pooled keep-alive connections and cached DNS lookups
+SOURCE_HTTP_DNS_CACHE_SECONDS = int(os.getenv("SOURCE_HTTP_DNS_CACHE_SECONDS", "300"))
+SOURCE_HTTP_KEEPALIVE_SECONDS = float(os.getenv("SOURCE_HTTP_KEEPALIVE_SECONDS", "30"))
+SOURCE_VALIDATION_TIMEOUT_SECONDS = 5
+
+# URL validation results, cached longer for valid URLs than for failures so
+# a host that was briefly down is retried soon. Set SOURCE_URL_CACHE_PATH
+# to an SQLite file to share them between workers and keep them across
+# restarts.
+SOURCE_URL_CACHE_VALID_TTL = float(os.getenv("SOURCE_URL_CACHE_VALID_TTL_SECONDS", "86400"))
+SOURCE_URL_CACHE_INVALID_TTL = float(os.getenv("SOURCE_URL_CACHE_INVALID_TTL_SECONDS", "900"))
+SOURCE_URL_CACHE_MAX_SIZE = int(os.getenv("SOURCE_URL_CACHE_MAX_SIZE", "20000"))
+SOURCE_URL_CACHE_PATH = os.getenv("SOURCE_URL_CACHE_PATH")
+
+# Per-host latency and health: hosts failing SOURCE_HOST_FAILURE_THRESHOLD
+# times in a row are skipped for SOURCE_HOST_COOLDOWN_SECONDS, hosts whose
+# last SOURCE_HOST_TRUST_AFTER URLs validated are trusted without a request
+# (0 disables), and each host's timeout adapts to its own p95 latency
+SOURCE_HOST_FAILURE_THRESHOLD = int(os.getenv("SOURCE_HOST_FAILURE_THRESHOLD", "3"))
+SOURCE_HOST_COOLDOWN_SECONDS = float(os.getenv("SOURCE_HOST_COOLDOWN_SECONDS", "300"))
+SOURCE_HOST_TRUST_AFTER = int(os.getenv("SOURCE_HOST_TRUST_AFTER", "20"))
+SOURCE_HOST_MIN_TIMEOUT_SECONDS = float(os.getenv("SOURCE_HOST_MIN_TIMEOUT_SECONDS", "1"))
+
+# Validated sources keyed on (response content hash, agent domain), so the
+# specialists' templated responses skip the LLM call and URL validation.
+# Entries older than SOURCE_CACHE_REVALIDATE_SECONDS are still served while
+# their URLs are re-checked in the background.
+SOURCE_CACHE_TTL = float(os.getenv("SOURCE_CACHE_TTL_SECONDS", "86400"))
+SOURCE_CACHE_MAX_SIZE = int(os.getenv("SOURCE_CACHE_MAX_SIZE", "5000"))
+SOURCE_CACHE_PATH = os.getenv("SOURCE_CACHE_PATH")
+SOURCE_CACHE_REVALIDATE_SECONDS = float(os.getenv("SOURCE_CACHE_REVALIDATE_SECONDS", "3600"))
+
+class IncrementalSourceParser:
+    """
+    Incremental parser for a streamed {"sources": [{...}, ...]} completion
+
+    feed() takes each text delta and returns the source objects completed
+    by it, so they can be validated while the rest is still generating.
+    Text outside the JSON (such as code fences) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Dict]:
+        self._buffer += text
+        completed = []
+        for index in range(self._position, len(self._buffer)):
+            char = self._buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if char == "{" and self._depth == 3:  # An object inside the top-level "sources" array
+                    self._object_start = index
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._object_start is not None:
+                    try:
+                        completed.append(json.loads(self._buffer[self._object_start:index + 1]))
+                    except json.JSONDecodeError as e:
+                        logger.debug(f"Skipping malformed streamed source: {e}")
+                    self._object_start = None
+                self._depth -= 1
+        self._position = len(self._buffer)
+        return [item for item in completed if isinstance(item, dict)]
+
 @dataclass
 class ValidatedSource:
     """A source that has been validated and deemed relevant"""
@@ -32,48 +128,156 @@ class DynamicSourceGenerator:
     
     def __init__(self):
         self.session: Optional[aiohttp.ClientSession] = None
-        self.url_cache: Dict[str, bool] = {}  # Cache for URL validation results
-        
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=5),
-            headers={'User-Agent': 'Expert-Agent-Source-Validator/1.0'}
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.url_cache = create_cache(
+            "validated_urls",
+            max_size=SOURCE_URL_CACHE_MAX_SIZE,
+            ttl=SOURCE_URL_CACHE_VALID_TTL,
+            path=SOURCE_URL_CACHE_PATH
+        )
+        # Per-host slots, dropped once no validation holds or awaits them
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_users: Dict[str, int] = {}
+        self.host_health = HostHealthIndex(
+            failure_threshold=SOURCE_HOST_FAILURE_THRESHOLD,
+            cooldown=SOURCE_HOST_COOLDOWN_SECONDS,
+            trust_after=SOURCE_HOST_TRUST_AFTER,
+            min_timeout=SOURCE_HOST_MIN_TIMEOUT_SECONDS
+        )
+        self.source_cache = create_cache(
+            "validated_sources",
+            max_size=SOURCE_CACHE_MAX_SIZE,
+            ttl=SOURCE_CACHE_TTL,
+            path=SOURCE_CACHE_PATH
         )
-        return self
+        self._inflight_sources = SingleFlight()
+        self._revalidations: Dict[str, asyncio.Task] = {}
+        self.revalidated_entries = 0
+        self.hedger = Hedger.from_environment()
         
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+    async def start(self):
+        """Open the shared HTTP session; called from the app lifespan, or lazily on first use"""
+        self._ensure_session()
+        
+    async def close(self):
+        """Stop background revalidation and close the shared HTTP session and its pooled connections"""
+        revalidations, self._revalidations = list(self._revalidations.values()), {}
+        for task in revalidations:
+            task.cancel()
+        await asyncio.gather(*revalidations, return_exceptions=True)
+        session, self.session, self._session_loop = self.session, None, None
+        if session and not session.closed:
+            await session.close()
             
-    async def validate_url(self, url: str) -> bool:
-        """Test if a URL is valid and accessible"""
-        if url in self.url_cache:
-            return self.url_cache[url]
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # A session is bound to the loop that created it; outside the app
+        # (scripts, tests) a new loop gets a new session
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=SOURCE_VALIDATION_CONCURRENCY,
+                    limit_per_host=SOURCE_VALIDATION_PER_HOST,
+                    ttl_dns_cache=SOURCE_HTTP_DNS_CACHE_SECONDS,
+                    keepalive_timeout=SOURCE_HTTP_KEEPALIVE_SECONDS
+                ),
+                timeout=aiohttp.ClientTimeout(total=SOURCE_VALIDATION_TIMEOUT_SECONDS),
+                headers={'User-Agent': 'Expert-Agent-Source-Validator/1.0'}
+            )
+            self._session_loop = loop
+        return self.session
             
-        if not self.session:
-            return False
+    async def validate_url(self, url: str, use_cache: bool = True) -> bool:
+        """
+        Test if a URL is valid and accessible, within the global and per-host
+        request limits. use_cache=False re-checks a URL even if it is cached.
+        """
+        # Clean and validate URL format
+        if not url.startswith(('http://', 'https://')):
+            url = f'https://{url}'
+            
+        cached = self.url_cache.get(url) if use_cache else None
+        if cached is not None:
+            return cached
             
         try:
-            # Clean and validate URL format
-            if not url.startswith(('http://', 'https://')):
-                url = f'https://{url}'
-                
             parsed = urlparse(url)
             if not parsed.netloc:
-                self.url_cache[url] = False
+                self._cache_url_result(url, False)
                 return False
                 
-            async with self.session.head(url, allow_redirects=True) as response:
-                is_valid = response.status < 400
-                self.url_cache[url] = is_valid
-                logger.debug(f"URL validation {url}: {response.status} -> {is_valid}")
-                return is_valid
+            host = parsed.netloc.lower()
+            if self.host_health.should_skip(host):
+                logger.debug(f"Skipping validation of {url}: {host} is failing")
+                return False  # Not cached; the host is retried after its cooldown
+            if self.host_health.is_trusted(host):
+                self._cache_url_result(url, True)
+                return True
                 
+            # The host slot comes first, so URLs queued behind one busy host
+            # do not hold global slots other hosts could use
+            async with self._host_slot(host), _validation_semaphore:
+                timeout = self.host_health.timeout_for(host, SOURCE_VALIDATION_TIMEOUT_SECONDS)
+                
+                async def head() -> int:
+                    async with self._ensure_session().head(
+                        url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=timeout)
+                    ) as response:
+                        return response.status
+                    
+                start = time.perf_counter()
+                try:
+                    # Hedge at this host's own latency percentile once known,
+                    # otherwise at the percentile across all hosts
+                    status = await self.hedger.run(
+                        head, delay=self.host_health.latency_percentile(host, self.hedger.percentile)
+                    )
+                    elapsed = time.perf_counter() - start
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.host_health.record(host, time.perf_counter() - start, reachable=False,
+                                            error=str(e) or type(e).__name__)
+                    raise
+            is_valid = status < 400
+            self.host_health.record(host, elapsed, reachable=status < 500, valid=is_valid)
+            self._cache_url_result(url, is_valid)
+            logger.debug(f"URL validation {url}: {status} -> {is_valid}")
+            return is_valid
+                
+        except asyncio.CancelledError:
+            raise  # Abandoned once enough sources validated; not a verdict on the URL
         except Exception as e:
             logger.debug(f"URL validation failed for {url}: {e}")
-            self.url_cache[url] = False
+            self._cache_url_result(url, False)
             return False
     
+    @contextlib.asynccontextmanager
+    async def _host_slot(self, host: str):
+        """One of the host's SOURCE_VALIDATION_PER_HOST concurrent validation slots"""
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(SOURCE_VALIDATION_PER_HOST))
+        self._host_users[host] = self._host_users.get(host, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._host_users[host] -= 1
+            if not self._host_users[host]:
+                del self._host_users[host], self._host_semaphores[host]
+    
+    def _cache_url_result(self, url: str, is_valid: bool):
+        self.url_cache.set(url, is_valid, ttl=SOURCE_URL_CACHE_VALID_TTL if is_valid else SOURCE_URL_CACHE_INVALID_TTL)
+    
+    def stats(self) -> Dict:
+        """URL validation cache counters, host skip/trust counts and hedging counters"""
+        return {
+            "url_cache": self.url_cache.stats(),
+            "source_cache": self.source_cache.stats(),
+            "source_single_flight": self._inflight_sources.stats(),
+            "revalidated_entries": self.revalidated_entries,
+            "skipped_requests": self.host_health.skipped,
+            "trusted_requests": self.host_health.trusted,
+            "hedging": self.hedger.stats()
+        }
+    
     def extract_topics_from_response(self, response: str, agent_domain: str) -> List[str]:
         """Extract key topics and concepts from the response text"""
         # Remove common words and focus on domain-specific terms
@@ -95,12 +299,10 @@ class DynamicSourceGenerator:
         
         return [topic[0] for topic in topics]
     
-    async def generate_relevant_knowledge_sources(self, response: str, agent_domain: str, topics: List[str]) -> List[ValidatedSource]:
+    async def generate_relevant_knowledge_sources(self, response: str, agent_domain: str, topics: List[str], max_sources: int = MAX_SUGGESTED_SOURCES) -> List[ValidatedSource]:
         """Use LLM to generate relevant knowledge sources based on response content"""
-        from utils.mcp_search import openai_client
-        
-        if not openai_client:
-            logger.warning("OpenAI client not available for source generation")
+        if not llm_client.available:
+            logger.warning("LLM client not available for source generation")
             return []
         
         source_generation_prompt = f"""
@@ -145,50 +347,106 @@ Respond in this exact JSON format:
   ]
 }}"""
 
+        messages = [
+            {"role": "system", "content": "You are a research librarian expert at identifying authoritative, relevant sources. Only suggest sources with real, working URLs."},
+            {"role": "user", "content": source_generation_prompt}
+        ]
+        
+        async def streamed_suggestions() -> AsyncIterator[Dict]:
+            # Each source object is handed to validation as soon as its closing brace arrives
+            parser = IncrementalSourceParser()
+            deltas = stream_chat_completion(model="gpt-3.5-turbo", messages=messages, temperature=0.3, max_tokens=800)
+            async with contextlib.aclosing(deltas):
+                async for delta in deltas:
+                    for source_data in parser.feed(delta):
+                        yield source_data
+        
         try:
-            response_obj = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a research librarian expert at identifying authoritative, relevant sources. Only suggest sources with real, working URLs."},
-                    {"role": "user", "content": source_generation_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=800
-            )
-            
-            suggested_sources = json.loads(response_obj.choices[0].message.content.strip())
-            
-            # Validate the suggested sources
-            validated_sources = []
-            for source_data in suggested_sources.get("sources", [])[:8]:  # Limit to 8 sources
-                title = source_data.get("title", "")
-                url = source_data.get("url", "")
-                description = source_data.get("description", "")
-                
-                if title and url:
-                    is_valid = await self.validate_url(url)
-                    if is_valid:
-                        # Calculate relevance based on LLM suggestion and content analysis
-                        relevance = self._calculate_llm_source_relevance(description, topics, response)
-                        
-                        validated_sources.append(ValidatedSource(
-                            title=title,
-                            url=url,
-                            relevance_score=relevance,
-                            source_type='general_knowledge',
-                            domain=agent_domain,
-                            description=description
-                        ))
-                        logger.info(f"Validated LLM-suggested source: {title} -> {url}")
-                    else:
-                        logger.warning(f"LLM suggested invalid URL: {url} for {title}")
-            
-            return validated_sources
-            
+            return await self.validate_suggested_sources(streamed_suggestions(), response, agent_domain, topics, max_sources)
         except Exception as e:
             logger.warning(f"LLM source generation failed: {e}")
             return []
     
+    async def validate_suggested_sources(
+        self,
+        suggestions: Union[Iterable[Dict], AsyncIterable[Dict]],
+        response: str,
+        agent_domain: str,
+        topics: List[str],
+        max_sources: int
+    ) -> List[ValidatedSource]:
+        """
+        Validate LLM-suggested sources concurrently, in completion order
+
+        suggestions may be a list or an async iterable such as the streamed
+        LLM suggestions; each one starts validating as soon as it arrives.
+        Returns as soon as max_sources suggestions have validated, closing
+        the suggestion stream and cancelling the probes still running, so
+        neither the rest of the completion nor one slow host holds up a
+        response.
+        """
+        if max_sources <= 0:
+            return []
+
+        async def validate(source_data: Dict) -> Optional[ValidatedSource]:
+            title, url = source_data["title"], source_data["url"]
+            description = source_data.get("description", "")
+            if not await self.validate_url(url):
+                logger.warning(f"LLM suggested invalid URL: {url} for {title}")
+                return None
+            logger.info(f"Validated LLM-suggested source: {title} -> {url}")
+            return ValidatedSource(
+                title=title,
+                url=url,
+                # Calculate relevance based on LLM suggestion and content analysis
+                relevance_score=self._calculate_llm_source_relevance(description, topics, response),
+                source_type='general_knowledge',
+                domain=agent_domain,
+                description=description
+            )
+
+        finished: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+
+        async def feed():
+            iterator = suggestions if isinstance(suggestions, AsyncIterable) else _iterate(suggestions)
+            seen_urls = set()
+            received = 0
+            async with contextlib.aclosing(iterator):
+                async for source_data in iterator:
+                    received += 1
+                    title = source_data.get("title", "")
+                    url = source_data.get("url", "")
+                    if title and url and url not in seen_urls:
+                        seen_urls.add(url)
+                        task = asyncio.ensure_future(validate(source_data))
+                        task.add_done_callback(finished.put_nowait)
+                        tasks.append(task)
+                    if received >= MAX_SUGGESTED_SOURCES:
+                        break
+
+        feeder = asyncio.ensure_future(feed())
+        feeder.add_done_callback(finished.put_nowait)
+        validated_sources = []
+        validations_done = 0
+        try:
+            while not (feeder.done() and validations_done == len(tasks)):
+                done = await finished.get()
+                if done is feeder:
+                    if done.exception() is not None:  # Keep what was suggested before the stream failed
+                        logger.warning(f"Source suggestion stream failed: {done.exception()}")
+                    continue
+                validations_done += 1
+                if done.result() is not None:
+                    validated_sources.append(done.result())
+                    if len(validated_sources) >= max_sources:
+                        break
+        finally:
+            for task in [feeder] + tasks:
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
+        return validated_sources
+    
     def _calculate_source_relevance(self, title: str, description: str, domain: str, topics: List[str]) -> float:
         """Calculate how relevant a source is to the domain and topics"""
         relevance = 0.0
@@ -236,21 +494,65 @@ Respond in this exact JSON format:
         """
         Generate and validate relevant sources dynamically based on response content only
         Uses LLM to suggest authoritative sources that support the information in the response
+        
+        Results are cached per (response content hash, agent domain), and
+        identical generations already in flight are joined.
         """
-        if not self.session:
-            async with self:
-                return await self._generate_sources_internal(response, agent_domain, max_sources)
-        else:
-            return await self._generate_sources_internal(response, agent_domain, max_sources)
+        cache_key = f"{hashlib.sha256(response.encode()).hexdigest()}|{agent_domain}"
+        cached = self.source_cache.get(cache_key)
+        if cached is not None and cached["max_sources"] >= max_sources:
+            if time.time() - cached["validated_at"] >= SOURCE_CACHE_REVALIDATE_SECONDS:
+                self._schedule_revalidation(cache_key, cached)
+            return [ValidatedSource(**item) for item in cached["sources"][:max_sources]]
+        
+        sources = await self._inflight_sources.do(
+            (cache_key, max_sources),
+            lambda: self._generate_and_cache_sources(cache_key, response, agent_domain, max_sources)
+        )
+        return list(sources)
+    
+    async def _generate_and_cache_sources(self, cache_key: str, response: str, agent_domain: str, max_sources: int) -> List[ValidatedSource]:
+        sources = await self._generate_sources_internal(response, agent_domain, max_sources)
+        if sources:  # An empty list usually means the LLM was unavailable; try again next time
+            self.source_cache.set(cache_key, {
+                "max_sources": max_sources,
+                "validated_at": time.time(),
+                "sources": [asdict(source) for source in sources]
+            })
+        return sources
+    
+    def _schedule_revalidation(self, cache_key: str, entry: Dict):
+        """Start one background HEAD re-check of a cached entry's URLs, unless one is running"""
+        if cache_key in self._revalidations:
+            return
+        task = asyncio.get_running_loop().create_task(self._revalidate(cache_key, entry))
+        self._revalidations[cache_key] = task
+        task.add_done_callback(lambda _: self._revalidations.pop(cache_key, None))
+    
+    async def _revalidate(self, cache_key: str, entry: Dict):
+        """Keep the sources whose URLs still validate; drop the entry if none do"""
+        try:
+            still_valid = await asyncio.gather(*(
+                self.validate_url(item["url"], use_cache=False) for item in entry["sources"]
+            ))
+            sources = [item for item, valid in zip(entry["sources"], still_valid) if valid]
+            if sources:
+                self.source_cache.set(cache_key, {**entry, "validated_at": time.time(), "sources": sources})
+            else:
+                self.source_cache.delete(cache_key)
+            self.revalidated_entries += 1
+            logger.debug(f"Revalidated cached sources: {len(sources)}/{len(entry['sources'])} still valid")
+        except Exception as e:
+            logger.warning(f"Source revalidation failed: {e}")
     
     async def _generate_sources_internal(self, response: str, agent_domain: str, max_sources: int) -> List[ValidatedSource]:
-        """Internal method to generate sources with active session"""
+        """Internal method to generate sources from the response content"""
         # Extract topics from response
         topics = self.extract_topics_from_response(response, agent_domain)
         logger.debug(f"Extracted topics: {topics[:5]}")  # Log top 5 topics
         
         # Generate all sources using LLM based on response content
-        all_sources = await self.generate_relevant_knowledge_sources(response, agent_domain, topics)
+        all_sources = await self.generate_relevant_knowledge_sources(response, agent_domain, topics, max_sources)
         
         # Sort by relevance and return top sources
         all_sources.sort(key=lambda x: x.relevance_score, reverse=True)
@@ -259,5 +561,9 @@ Respond in this exact JSON format:
         logger.info(f"Generated {len(final_sources)} validated sources from response content")
         return final_sources
 
+async def _iterate(items: Iterable[Dict]) -> AsyncIterator[Dict]:
+    for item in items:
+        yield item
+
 # Global instance
 dynamic_source_generator = DynamicSourceGenerator()
\ No newline at end of file
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Fake MCP Search Server
+
+A stand-in for `mcp-search-server` for tests and load benchmarks. It
+speaks newline-delimited JSON-RPC over stdio, answers `initialize`,
+`ping`, `tools/list` and `tools/call` for a `search` tool, and returns
+deterministic results after a configurable latency. Requests are answered
+concurrently and may complete out of order, like a real server.
+
+    MCP_SEARCH_COMMAND="python utils/fake_mcp_server.py --latency 0.2"
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+SEARCH_TOOL = {
+    "name": "search",
+    "description": "Fake web search returning deterministic results",
+    "inputSchema": {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "max_results": {"type": "integer"}
+        },
+        "required": ["query"]
+    }
+}
+
+_write_lock = threading.Lock()
+
+def _send(message):
+    with _write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+def _fake_results(query, max_results):
+    slug = "-".join(query.lower().split())[:60]
+    return [
+        {
+            "title": f"Result {i} for {query}",
+            "url": f"https://example.com/{slug}/{i}",
+            "snippet": f"Fake snippet {i} about {query}."
+        }
+        for i in range(1, max_results + 1)
+    ]
+
+def _handle(message, latency):
+    method = message.get("method")
+    params = message.get("params") or {}
+
+    if method == "initialize":
+        result = {
+            "protocolVersion": params.get("protocolVersion", "2024-11-05"),
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": "fake-mcp-search-server", "version": "1.0.0"}
+        }
+    elif method == "ping":
+        result = {}
+    elif method == "tools/list":
+        result = {"tools": [SEARCH_TOOL]}
+    elif method == "tools/call" and params.get("name") == "search":
+        arguments = params.get("arguments") or {}
+        results = _fake_results(arguments.get("query", ""), int(arguments.get("max_results", 5)))
+        result = {"content": [{"type": "text", "text": json.dumps(results)}]}
+    else:
+        _send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": f"Unknown method {method}"}})
+        return
+
+    if method == "tools/call" and latency > 0:
+        threading.Timer(latency, _send, args=({"jsonrpc": "2.0", "id": message["id"], "result": result},)).start()
+    else:
+        _send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake MCP search server speaking JSON-RPC over stdio")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each search responds")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="Seconds before the server starts reading requests")
+    args = parser.parse_args()
+    time.sleep(args.startup_delay)
+
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if "id" in message:  # Notifications get no response
+            _handle(message, args.latency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Dependency Health Tracking
+
+A small state machine for external dependencies (the MCP search server,
+LLM providers) that are probed or called in the background:
+
+    unknown  -> not yet seen healthy; callers treat it as unavailable
+    healthy  -> last check succeeded
+    degraded -> failing since it was last healthy, below the circuit threshold
+    open     -> too many consecutive failures; calls are short-circuited
+                until the owner's next re-probe, open_cooldown seconds
+                later, succeeds
+
+Any success closes the circuit again, so a dependency that comes back is
+picked up without restarting the process.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+UNKNOWN = "unknown"
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+OPEN = "open"
+
+class HealthTracker:
+    """Availability state of one dependency, driven by success/failure reports"""
+
+    def __init__(self, failure_threshold: int = 3, open_cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.open_cooldown = open_cooldown
+        self.state = UNKNOWN
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_checked_at: Optional[float] = None
+
+    @property
+    def is_available(self) -> bool:
+        """Whether callers should use the dependency right now"""
+        return self.state in (HEALTHY, DEGRADED)
+
+    def record_success(self):
+        self.state = HEALTHY
+        self.consecutive_failures = 0
+        self.successes += 1
+        self.last_checked_at = time.time()
+
+    def record_failure(self, error: Any = None):
+        self.consecutive_failures += 1
+        self.failures += 1
+        self.last_error = str(error) if error is not None else None
+        self.last_checked_at = time.time()
+        if self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+        elif self.state == HEALTHY:
+            self.state = DEGRADED  # Never-healthy dependencies stay unknown until the circuit opens
+
+    def next_check_delay(self, interval: float) -> float:
+        """Seconds until the next probe: the regular interval while healthy, the cooldown otherwise"""
+        return interval if self.state == HEALTHY else self.open_cooldown
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_checked_at": self.last_checked_at
+        }
@@ -0,0 +1,116 @@
+"""
+Hedged Requests
+
+Cuts tail latency for idempotent calls: if a call has not finished by the
+HEDGE_PERCENTILE of its recently observed latency, a duplicate is sent, the
+first answer wins and the other call is cancelled. Hedges are capped at
+HEDGE_MAX_EXTRA_LOAD extra calls per call made, and none are sent until
+HEDGE_MIN_SAMPLES latencies have been observed. Opt-in with
+HEDGE_REQUESTS=true.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MAX_EXTRA_LOAD = float(os.getenv("HEDGE_MAX_EXTRA_LOAD", "0.1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+T = TypeVar("T")
+
+class Hedger:
+    """Runs calls with at most one hedge each, learning the hedge delay from observed latencies"""
+
+    def __init__(self, enabled: bool = False, percentile: float = 0.95, max_extra_load: float = 0.1,
+                 min_samples: int = 20, window: int = 500):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.fired = 0
+        self.won = 0
+        self.over_budget = 0
+
+    @classmethod
+    def from_environment(cls) -> "Hedger":
+        return cls(
+            enabled=HEDGE_REQUESTS,
+            percentile=HEDGE_PERCENTILE,
+            max_extra_load=HEDGE_MAX_EXTRA_LOAD,
+            min_samples=HEDGE_MIN_SAMPLES
+        )
+
+    def hedge_delay(self) -> Optional[float]:
+        """The configured percentile of observed latency, once there are enough samples"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        delay: Optional[float] = None,
+        discard: Optional[Callable[[T], Awaitable[Any]]] = None
+    ) -> T:
+        """
+        Await call(), sending one duplicate call() if the first has not
+        finished after delay (default: hedge_delay()). discard() releases
+        the result of a call that succeeded but lost (e.g. closes a stream).
+        """
+        start = time.perf_counter()
+        self.calls += 1
+        delay = delay if delay is not None else self.hedge_delay()
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+        winner = None
+        try:
+            if self.enabled and delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self.fired < self.max_extra_load * self.calls:
+                        self.fired += 1
+                        tasks.append(asyncio.ensure_future(call()))
+                    else:
+                        self.over_budget += 1
+
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in tasks if task in done and task.exception() is None), None)
+                if winner is not None:
+                    break
+                if not pending:
+                    return primary.result()  # Every call failed; raise the primary's error
+            if winner is not primary:
+                self.won += 1
+            self.latencies.append(time.perf_counter() - start)
+            return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if discard is not None:  # A loser may have succeeded before it could be cancelled
+                for task in tasks:
+                    if task is not winner and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "hedges_fired": self.fired,
+            "hedges_won": self.won,
+            "over_budget": self.over_budget,
+            "hedge_delay_seconds": self.hedge_delay()
+        }
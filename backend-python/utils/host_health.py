@@ -0,0 +1,132 @@
+"""
+Per-Host Health and Latency Index
+
+Rolling statistics for the hosts that source validation sends requests
+to. Each host keeps its recent latencies and outcomes, which drive:
+
+    adaptive timeouts  a host's timeout follows its own p95 latency, so
+                       fast hosts fail fast and slow ones are not cut off
+    skipping           a host that keeps failing has its circuit opened
+                       (see utils.health) and is not contacted until the
+                       cooldown ends, when one trial request is let through
+    trust              a host whose last trust_after URLs all validated is
+                       trusted without a request
+
+Hosts are kept in LRU order and bounded by max_hosts.
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from .health import OPEN, HealthTracker
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class HostRecord:
+    """Recent latencies and outcomes for one host"""
+
+    def __init__(self, window: int, failure_threshold: int, cooldown: float):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True if the host answered
+        self.consecutive_valid = 0
+        self.health = HealthTracker(failure_threshold=failure_threshold, open_cooldown=cooldown)
+
+    def latency_percentile(self, fraction: float) -> Optional[float]:
+        return _percentile(sorted(self.latencies), fraction) if self.latencies else None
+
+    @property
+    def failure_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+class HostHealthIndex:
+    """Rolling per-host latency and failure statistics used to tune, skip or trust requests"""
+
+    def __init__(self, window: int = 50, max_hosts: int = 1000, failure_threshold: int = 3,
+                 cooldown: float = 300.0, trust_after: int = 20, min_samples: int = 5,
+                 timeout_multiplier: float = 3.0, min_timeout: float = 1.0):
+        self.window = window
+        self.max_hosts = max_hosts
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.trust_after = trust_after
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self._hosts: "OrderedDict[str, HostRecord]" = OrderedDict()
+        self.skipped = 0
+        self.trusted = 0
+
+    def _record(self, host: str) -> HostRecord:
+        record = self._hosts.get(host)
+        if record is None:
+            record = HostRecord(self.window, self.failure_threshold, self.cooldown)
+            self._hosts[host] = record
+            if len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host)
+        return record
+
+    def should_skip(self, host: str) -> bool:
+        """True while the host's circuit is open and its cooldown has not elapsed"""
+        record = self._hosts.get(host)
+        if record is None or record.health.state != OPEN:
+            return False
+        if time.time() - record.health.last_checked_at >= self.cooldown:
+            return False  # Let one trial request through; its outcome re-opens or closes the circuit
+        self.skipped += 1
+        return True
+
+    def is_trusted(self, host: str) -> bool:
+        """True if the host's last trust_after URLs all validated"""
+        record = self._hosts.get(host)
+        if record is None or self.trust_after <= 0 or record.consecutive_valid < self.trust_after:
+            return False
+        self.trusted += 1
+        return True
+
+    def timeout_for(self, host: str, default: float) -> float:
+        """timeout_multiplier x the host's p95 latency, within [min_timeout, default]"""
+        record = self._hosts.get(host)
+        if record is None or len(record.latencies) < self.min_samples:
+            return default
+        return max(self.min_timeout, min(default, record.latency_percentile(0.95) * self.timeout_multiplier))
+
+    def latency_percentile(self, host: str, fraction: float) -> Optional[float]:
+        """The host's latency at fraction (e.g. 0.95), once it has min_samples requests"""
+        record = self._hosts.get(host)
+        if record is None or len(record.latencies) < self.min_samples:
+            return None
+        return record.latency_percentile(fraction)
+
+    def record(self, host: str, latency: float, reachable: bool, valid: bool = False, error: Any = None):
+        """
+        Record one request. reachable is whether the host answered at all
+        (any HTTP status); valid is whether the URL itself checked out.
+        """
+        record = self._record(host)
+        record.latencies.append(latency)
+        record.outcomes.append(reachable)
+        if reachable:
+            record.health.record_success()
+        else:
+            record.health.record_failure(error)
+        record.consecutive_valid = record.consecutive_valid + 1 if valid else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        hosts = {}
+        for host, record in self._hosts.items():
+            latencies = sorted(record.latencies)
+            hosts[host] = {
+                "samples": len(latencies),
+                "p50_seconds": round(_percentile(latencies, 0.5), 4) if latencies else None,
+                "p95_seconds": round(_percentile(latencies, 0.95), 4) if latencies else None,
+                "failure_rate": round(record.failure_rate, 3),
+                "state": record.health.state,
+                "consecutive_valid": record.consecutive_valid,
+                "trusted": self.trust_after > 0 and record.consecutive_valid >= self.trust_after,
+                "last_error": record.health.last_error
+            }
+        return {"hosts": hosts, "skipped_requests": self.skipped, "trusted_requests": self.trusted}
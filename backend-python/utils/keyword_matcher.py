@@ -0,0 +1,94 @@
+"""
+Compiled Multi-Keyword Matcher
+
+Aho-Corasick automaton that scans a query once and reports the hits for
+every named keyword set it was built with. Matches must start at a word
+boundary, so "ml" does not match inside "html" and "data" does not match
+inside "update", while inflected forms ("model" in "modeling") still match.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+class KeywordMatcher:
+    """Single-pass matcher over several named keyword sets"""
+
+    def __init__(self, keyword_sets: Dict[str, Iterable[str]]):
+        # Normalized, de-duplicated keywords per set (order preserved)
+        self.keyword_sets: Dict[str, List[str]] = {
+            name: list(dict.fromkeys(normalize_text(keyword) for keyword in keywords if keyword.strip()))
+            for name, keywords in keyword_sets.items()
+        }
+
+        # Which sets each keyword belongs to
+        self._owners: Dict[str, List[str]] = {}
+        for name, keywords in self.keyword_sets.items():
+            for keyword in keywords:
+                self._owners.setdefault(keyword, []).append(name)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self._build()
+
+    def _build(self):
+        """Build the trie, then failure links breadth-first"""
+        for keyword in self._owners:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state].append(keyword)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the failure state
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Scan text once and return the matched keywords for every set
+
+        Args:
+            text: Text to scan (normalized internally)
+
+        Returns:
+            Dict[str, Set[str]]: Matched keywords per set name (empty set if none)
+        """
+        return self.scan_normalized(normalize_text(text))
+
+    def scan_normalized(self, text: str) -> Dict[str, Set[str]]:
+        """Scan text that has already been passed through normalize_text"""
+        hits: Dict[str, Set[str]] = {name: set() for name in self.keyword_sets}
+        goto, fail, output, owners = self._goto, self._fail, self._output, self._owners
+
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                start = position - len(keyword) + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue  # Keyword starts mid-word
+                for name in owners[keyword]:
+                    hits[name].add(keyword)
+
+        return hits
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so multi-word keywords match reliably"""
+    return " ".join(text.lower().split())
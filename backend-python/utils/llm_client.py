@@ -0,0 +1,394 @@
+"""
+Shared LLM Client
+
+One process-wide client for every LLM call (search decisions, source
+suggestions). Each call passes through, in order:
+
+    circuit breaker  after LLM_FAILURE_THRESHOLD consecutive failed calls the
+                     provider is not called for LLM_CIRCUIT_COOLDOWN_SECONDS
+    token bucket     LLM_RATE_LIMIT_PER_SECOND sustained, LLM_RATE_LIMIT_BURST
+                     burst (0 = unlimited)
+    concurrency cap  at most LLM_MAX_CONCURRENCY calls in flight
+    retries          throttling, connection, timeout and 5xx errors are
+                     retried up to LLM_MAX_RETRIES times with full-jitter
+                     exponential backoff, within the call's
+                     LLM_TIMEOUT_SECONDS budget
+    hedging          opt-in (see utils.hedging): a slow call is duplicated
+                     and the first answer wins
+
+and its latency and token usage are recorded for /api/stats.
+
+LLM_PROVIDER=fake swaps OpenAI for a deterministic offline provider with
+LLM_FAKE_LATENCY_SECONDS latency, for benchmarks and tests.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+import openai
+
+from .health import OPEN, HealthTracker
+from .hedging import Hedger
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "15"))
+LLM_RATE_LIMIT_PER_SECOND = float(os.getenv("LLM_RATE_LIMIT_PER_SECOND", "0"))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+LLM_FAILURE_THRESHOLD = int(os.getenv("LLM_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", "30"))
+LLM_FAKE_LATENCY_SECONDS = float(os.getenv("LLM_FAKE_LATENCY_SECONDS", "0.2"))
+LATENCY_WINDOW = 1000  # Recent call latencies kept for percentiles
+
+# Errors worth retrying: throttling, connection problems and timeouts, server errors
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError, TimeoutError)
+
+class LLMUnavailableError(Exception):
+    """No provider configured, or the circuit breaker is open"""
+
+class LLMOverloadedError(LLMUnavailableError):
+    """The timeout ran out waiting for a rate-limit token or concurrency slot"""
+
+class TokenBucket:
+    """Async token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # Waiters are served in arrival order
+        self.waits = 0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                self.waits += 1
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class FakeChatProvider:
+    """
+    Offline stand-in for the OpenAI client: answers search-decision and
+    source-suggestion prompts with deterministic JSON after a fixed latency,
+    streamed or not, with token usage
+    """
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages, stream: bool = False, **kwargs):
+        prompt = messages[-1]["content"]
+        content = self._respond(prompt)
+        usage = SimpleNamespace(
+            prompt_tokens=len(prompt) // 4,
+            completion_tokens=len(content) // 4,
+            total_tokens=(len(prompt) + len(content)) // 4
+        )
+        if stream:
+            return _FakeStream(content, usage, self.latency)
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    @staticmethod
+    def _respond(prompt: str) -> str:
+        fresh = any(word in prompt.lower() for word in ("latest", "recent", "current", "today"))
+        decision = {
+            "should_search": fresh,
+            "reasoning": "Fake provider decision",
+            "confidence": 0.8,
+            "search_type": "fresh_data" if fresh else "none"
+        }
+        if '"decisions"' in prompt:
+            ids = [int(match) for match in re.findall(r'\{"id": (\d+)', prompt)]
+            return json.dumps({"decisions": [{"id": request_id, **decision} for request_id in ids]})
+        if '"sources"' in prompt:
+            return json.dumps({"sources": [
+                {"title": f"Reference {i}", "url": f"https://example.com/reference/{i}", "description": "Fake provider source"}
+                for i in range(1, 7)
+            ]})
+        return json.dumps(decision)
+
+    async def close(self):
+        pass
+
+class _FakeStream:
+    """Async iterator of chat.completion.chunk-like objects, the last one carrying usage"""
+
+    def __init__(self, content: str, usage: SimpleNamespace, latency: float):
+        self._pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        self._usage = usage
+        self._delay = latency / max(1, len(self._pieces))
+        self._closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for piece in self._pieces:
+            if self._closed:
+                return
+            await asyncio.sleep(self._delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+        yield SimpleNamespace(choices=[], usage=self._usage)
+
+    async def close(self):
+        self._closed = True
+
+def _percentile(values, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class LLMClient:
+    """Rate-limited, retrying, circuit-broken chat completions on one pooled provider client"""
+
+    def __init__(self, provider: Any = None, max_concurrency: int = 16, timeout: float = 15.0,
+                 rate_limiter: Optional[TokenBucket] = None, max_retries: int = 2,
+                 retry_base_delay: float = 0.5, retry_max_delay: float = 8.0,
+                 failure_threshold: int = 5, circuit_cooldown: float = 30.0):
+        self.provider = provider
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.health = HealthTracker(failure_threshold=failure_threshold, open_cooldown=circuit_cooldown)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.queue_timeouts = 0
+        # Hedging (HEDGE_REQUESTS) of completions and of opening streams,
+        # which have their own latency distributions
+        self.hedger = Hedger.from_environment()
+        self.stream_hedger = Hedger.from_environment()
+
+    @classmethod
+    def from_environment(cls) -> "LLMClient":
+        provider = None
+        if LLM_PROVIDER == "fake":
+            provider = FakeChatProvider(LLM_FAKE_LATENCY_SECONDS)
+            logger.info(f"Using the fake LLM provider ({LLM_FAKE_LATENCY_SECONDS}s latency)")
+        else:
+            try:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if api_key:
+                    provider = openai.AsyncOpenAI(
+                        api_key=api_key,
+                        timeout=LLM_TIMEOUT_SECONDS,
+                        max_retries=0,  # Retries happen here, inside the shared rate limit
+                        http_client=openai.DefaultAsyncHttpxClient(
+                            limits=httpx.Limits(
+                                max_connections=LLM_MAX_CONNECTIONS,
+                                max_keepalive_connections=LLM_MAX_CONNECTIONS
+                            )
+                        )
+                    )
+                else:
+                    logger.warning("OPENAI_API_KEY not set - LLM search decisions will use fallback logic")
+            except Exception as e:
+                logger.warning(f"Failed to initialize OpenAI client: {e} - Using fallback search decisions")
+
+        return cls(
+            provider=provider,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            timeout=LLM_TIMEOUT_SECONDS,
+            rate_limiter=TokenBucket(LLM_RATE_LIMIT_PER_SECOND, LLM_RATE_LIMIT_BURST) if LLM_RATE_LIMIT_PER_SECOND > 0 else None,
+            max_retries=LLM_MAX_RETRIES,
+            retry_base_delay=LLM_RETRY_BASE_DELAY_SECONDS,
+            retry_max_delay=LLM_RETRY_MAX_DELAY_SECONDS,
+            failure_threshold=LLM_FAILURE_THRESHOLD,
+            circuit_cooldown=LLM_CIRCUIT_COOLDOWN_SECONDS
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether a provider is configured (the circuit may still reject calls)"""
+        return self.provider is not None
+
+    def _check_circuit(self):
+        if self.provider is None:
+            raise LLMUnavailableError("No LLM provider configured")
+        if (self.health.state == OPEN
+                and time.time() - self.health.last_checked_at < self.health.open_cooldown):
+            self.short_circuited += 1
+            raise LLMUnavailableError(f"LLM circuit open: {self.health.last_error}")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max_delay, base * 2^attempt)]"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def _acquire_slot(self, deadline: float, rate_limited: bool = True):
+        """
+        Wait for a rate-limit token and a concurrency slot. Running out of
+        time here is local queueing, not a provider failure, so it raises
+        LLMOverloadedError and leaves the circuit alone.
+        """
+        try:
+            async with asyncio.timeout_at(deadline):
+                if rate_limited and self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.queue_timeouts += 1
+            raise LLMOverloadedError(f"No LLM capacity within {self.timeout}s") from None
+
+    async def _with_retries(self, attempt_call):
+        """
+        Run attempt_call() under the rate limit and concurrency cap, retrying
+        retryable errors while the timeout budget allows
+        """
+        self._check_circuit()
+        self.calls += 1
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        attempt = 0
+        while True:
+            await self._acquire_slot(deadline)
+            try:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        return await attempt_call()
+                finally:
+                    self._semaphore.release()
+            except RETRYABLE_ERRORS as e:
+                delay = self._backoff(attempt)
+                if attempt >= self.max_retries or asyncio.get_running_loop().time() + delay >= deadline:
+                    self.failures += 1
+                    self.health.record_failure(str(e) or type(e).__name__)
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.debug(f"Retrying LLM call in {delay:.2f}s after {type(e).__name__}")
+                await asyncio.sleep(delay)
+            except Exception:
+                self.failures += 1  # A bad request says nothing about provider health
+                raise
+
+    def _record_usage(self, model: str, usage: Any):
+        if usage is None:
+            return
+        totals = self.tokens.setdefault(model, {"prompt_tokens": 0, "completion_tokens": 0})
+        totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    async def chat(self, **kwargs):
+        """A chat completion, as returned by the provider"""
+        start = time.perf_counter()
+        response = await self.hedger.run(
+            lambda: self._with_retries(lambda: self.provider.chat.completions.create(**kwargs))
+        )
+        self.latencies.append(time.perf_counter() - start)
+        self.health.record_success()
+        self._record_usage(kwargs.get("model", ""), getattr(response, "usage", None))
+        return response
+
+    async def stream_chat(self, **kwargs) -> AsyncIterator[str]:
+        """
+        A streamed chat completion, yielding content deltas as they arrive.
+        Opening the stream is retried like chat(); the stream holds a
+        concurrency slot until it ends, and the timeout bounds all of it.
+        Closing the generator early closes the provider's stream.
+        """
+        start = time.perf_counter()
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        stream = await self.stream_hedger.run(
+            lambda: self._with_retries(lambda: self.provider.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **kwargs
+            )),
+            discard=lambda losing_stream: losing_stream.close()
+        )
+        try:
+            await self._acquire_slot(deadline, rate_limited=False)
+        except LLMOverloadedError:
+            await stream.close()
+            raise
+        usage = None
+        failed = False
+        try:
+            chunks = stream.__aiter__()
+            while True:
+                async with asyncio.timeout_at(deadline):
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        break
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except RETRYABLE_ERRORS as e:
+            failed = True
+            self.failures += 1
+            self.health.record_failure(str(e) or type(e).__name__)
+            raise
+        finally:
+            # Also runs when the consumer stops early, which is not a failure
+            self._semaphore.release()
+            await stream.close()
+            self._record_usage(kwargs.get("model", ""), usage)
+            if not failed:
+                self.latencies.append(time.perf_counter() - start)
+                self.health.record_success()
+
+    async def close(self):
+        """Release the provider's pooled connections"""
+        if self.provider is not None:
+            await self.provider.close()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "provider": type(self.provider).__name__ if self.provider is not None else None,
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "queue_timeouts": self.queue_timeouts,
+            "rate_limited_waits": self.rate_limiter.waits if self.rate_limiter is not None else 0,
+            "latency_p50_seconds": _percentile(latencies, 0.5),
+            "latency_p95_seconds": _percentile(latencies, 0.95),
+            "latency_p99_seconds": _percentile(latencies, 0.99),
+            "tokens": self.tokens,
+            "circuit": self.health.snapshot(),
+            "hedging": {"chat": self.hedger.stats(), "stream": self.stream_hedger.stats()}
+        }
+
+# Global instance
+llm_client = LLMClient.from_environment()
+
+async def create_chat_completion(**kwargs):
+    """Chat completion on the shared client"""
+    return await llm_client.chat(**kwargs)
+
+def stream_chat_completion(**kwargs) -> AsyncIterator[str]:
+    """Streamed chat completion on the shared client, yielding content deltas"""
+    return llm_client.stream_chat(**kwargs)
+
+async def close_llm_client():
+    """Release the shared client's pooled connections"""
+    await llm_client.close()
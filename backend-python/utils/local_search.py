@@ -0,0 +1,299 @@
+"""
+Local BM25 Search Backend
+
+An offline search backend over a local document corpus, used instead of
+the MCP server when SEARCH_BACKEND=local. Documents are indexed into an
+on-disk inverted index made of immutable segments; each ingestion writes
+a new segment, and segments are merged once there are too many. Postings
+are NumPy arrays opened memory-mapped, so opening an index is cheap and
+only the pages a query touches are read. Queries are scored with BM25.
+
+Index layout (one directory):
+
+    manifest.json          segments, document count and total length
+    docs.jsonl             {title, url, snippet} per document, in id order
+    seg-<n>.terms.json     term -> [offset, length] into the postings
+    seg-<n>.docs.npy       posting document ids (uint32, global ids)
+    seg-<n>.tfs.npy        posting term frequencies (uint16)
+    seg-<n>.lengths.npy    token count of each document in the segment
+
+Ingest from the command line:
+
+    python -m utils.local_search ingest ./search-index corpus.jsonl
+    python -m utils.local_search search ./search-index "vector databases"
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .keyword_matcher import normalize_text
+from .query_context import TOKEN_PATTERN
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_SEGMENTS = 8  # Segments are merged into one beyond this
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+@dataclass
+class _Segment:
+    name: str
+    base: int  # Global id of the segment's first document
+    terms: Dict[str, Tuple[int, int]]
+    docs: np.ndarray
+    tfs: np.ndarray
+    lengths: np.ndarray
+
+class LocalSearchIndex:
+    """BM25 inverted index stored as memory-mapped segments in a directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()  # Serializes ingestion; queries read a snapshot
+        self._segments: List[_Segment] = []
+        self._documents: List[Dict[str, str]] = []
+        self._urls = set()
+        self._doc_lengths = np.zeros(0, dtype=np.uint32)
+        self._docs_bytes = 0  # Length of docs.jsonl up to the last committed document
+        self._total_length = 0
+        self._next_segment = 1
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        manifest_path = self._file("manifest.json")
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+        # Documents appended by an ingestion that never committed its manifest
+        # are ignored, and truncated away by the next ingestion
+        with open(self._file("docs.jsonl"), "rb") as docs_file:
+            for line in docs_file:
+                if len(self._documents) == manifest["num_docs"]:
+                    break
+                self._documents.append(json.loads(line))
+                self._docs_bytes += len(line)
+        self._urls = {document["url"] for document in self._documents}
+
+        self._segments = [self._open_segment(entry["name"], entry["base"]) for entry in manifest["segments"]]
+        self._next_segment = manifest["next_segment"]
+        self._total_length = manifest["total_length"]
+        self._doc_lengths = self._concat_lengths(self._segments)
+
+    def _open_segment(self, name: str, base: int) -> _Segment:
+        with open(self._file(f"{name}.terms.json")) as terms_file:
+            terms = {term: tuple(span) for term, span in json.load(terms_file).items()}
+        return _Segment(
+            name=name,
+            base=base,
+            terms=terms,
+            docs=np.load(self._file(f"{name}.docs.npy"), mmap_mode="r"),
+            tfs=np.load(self._file(f"{name}.tfs.npy"), mmap_mode="r"),
+            lengths=np.load(self._file(f"{name}.lengths.npy"), mmap_mode="r")
+        )
+
+    @staticmethod
+    def _concat_lengths(segments: List[_Segment]) -> np.ndarray:
+        if not segments:
+            return np.zeros(0, dtype=np.uint32)
+        return np.concatenate([np.asarray(segment.lengths) for segment in segments])
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """
+        Index new documents as one new segment; URLs already indexed are skipped
+
+        Each document needs a url and title; snippet and text are optional.
+        Title, snippet and text are indexed, and title, url and snippet are
+        returned in results.
+
+        Returns:
+            int: Number of documents added
+        """
+        with self._lock:
+            base = len(self._documents)
+            new_documents, postings, lengths = [], {}, []
+            seen = set(self._urls)
+            for document in documents:
+                url = document.get("url")
+                if not url or url in seen:
+                    continue
+                seen.add(url)
+                doc_id = base + len(new_documents)
+                tokens = tokenize(" ".join(
+                    document.get(field, "") for field in ("title", "snippet", "text")
+                ))
+                for term, count in Counter(tokens).items():
+                    postings.setdefault(term, []).append((doc_id, min(count, 65535)))
+                lengths.append(len(tokens))
+                new_documents.append({
+                    "title": document.get("title", ""),
+                    "url": url,
+                    "snippet": document.get("snippet", "")
+                })
+
+            if not new_documents:
+                return 0
+
+            name = f"seg-{self._next_segment:06d}"
+            self._write_segment(name, postings, lengths)
+            with open(self._file("docs.jsonl"), "ab") as docs_file:
+                # Drop orphans, so document ids stay line numbers
+                docs_file.truncate(self._docs_bytes)
+                for document in new_documents:
+                    docs_file.write((json.dumps(document) + "\n").encode())
+                docs_bytes = docs_file.tell()
+
+            segments = self._segments + [self._open_segment(name, base)]
+            self._commit(segments, self._documents + new_documents,
+                         self._total_length + sum(lengths), self._next_segment + 1)
+            self._docs_bytes = docs_bytes
+            self._urls = seen
+            logger.info(f"Indexed {len(new_documents)} documents into {name} ({len(self._documents)} total)")
+
+            if len(self._segments) > MAX_SEGMENTS:
+                self._merge_segments()
+            return len(new_documents)
+
+    def _write_segment(self, name: str, postings: Dict[str, List[Tuple[int, int]]], lengths: List[int]):
+        terms, doc_ids, tfs = {}, [], []
+        for term in sorted(postings):
+            entries = postings[term]
+            terms[term] = [len(doc_ids), len(entries)]
+            doc_ids.extend(doc_id for doc_id, _ in entries)
+            tfs.extend(tf for _, tf in entries)
+        np.save(self._file(f"{name}.docs.npy"), np.asarray(doc_ids, dtype=np.uint32))
+        np.save(self._file(f"{name}.tfs.npy"), np.asarray(tfs, dtype=np.uint16))
+        np.save(self._file(f"{name}.lengths.npy"), np.asarray(lengths, dtype=np.uint32))
+        with open(self._file(f"{name}.terms.json"), "w") as terms_file:
+            json.dump(terms, terms_file)
+
+    def _commit(self, segments: List[_Segment], documents: List[Dict[str, str]], total_length: int, next_segment: int):
+        """Atomically replace the manifest, then publish the new snapshot to queries"""
+        manifest = {
+            "segments": [{"name": segment.name, "base": segment.base} for segment in segments],
+            "num_docs": len(documents),
+            "total_length": total_length,
+            "next_segment": next_segment
+        }
+        temp_path = self._file("manifest.json.tmp")
+        with open(temp_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(temp_path, self._file("manifest.json"))
+
+        self._doc_lengths = self._concat_lengths(segments)
+        self._documents = documents
+        self._total_length = total_length
+        self._next_segment = next_segment
+        self._segments = segments
+
+    def _merge_segments(self):
+        """Merge every segment into one; postings stay sorted because ids grow with segments"""
+        old_segments = self._segments
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for segment in old_segments:
+            for term, (offset, length) in segment.terms.items():
+                postings.setdefault(term, []).extend(zip(
+                    segment.docs[offset:offset + length].tolist(),
+                    segment.tfs[offset:offset + length].tolist()
+                ))
+
+        name = f"seg-{self._next_segment:06d}"
+        self._write_segment(name, postings, self._doc_lengths.tolist())
+        self._commit([self._open_segment(name, 0)], self._documents,
+                     self._total_length, self._next_segment + 1)
+
+        for segment in old_segments:
+            for suffix in ("terms.json", "docs.npy", "tfs.npy", "lengths.npy"):
+                try:
+                    os.remove(self._file(f"{segment.name}.{suffix}"))
+                except OSError as e:
+                    logger.debug(f"Could not remove merged segment file: {e}")
+        logger.info(f"Merged {len(old_segments)} index segments into {name}")
+
+    def search_sync(self, query: str, max_results: int = 5) -> List[Tuple[Dict[str, str], float]]:
+        """(document, BM25 score) pairs for the best matches, highest score first"""
+        segments, documents, doc_lengths = self._segments, self._documents, self._doc_lengths
+        num_docs = len(doc_lengths)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not num_docs or not terms or max_results <= 0:
+            return []
+
+        average_length = self._total_length / num_docs
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term in terms:
+            spans = [(segment, segment.terms[term]) for segment in segments if term in segment.terms]
+            doc_frequency = sum(length for _, (_, length) in spans)
+            if not doc_frequency:
+                continue
+            idf = math.log(1 + (num_docs - doc_frequency + 0.5) / (doc_frequency + 0.5))
+            for segment, (offset, length) in spans:
+                doc_ids = segment.docs[offset:offset + length]
+                tfs = segment.tfs[offset:offset + length].astype(np.float32)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[doc_ids] / average_length)
+                scores[doc_ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > max_results:
+            matched = matched[np.argpartition(-scores[matched], max_results - 1)[:max_results]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(documents[doc_id], float(scores[doc_id])) for doc_id in matched]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "local",
+            "path": self.path,
+            "documents": len(self._documents),
+            "segments": len(self._segments),
+            "terms": sum(len(segment.terms) for segment in self._segments)
+        }
+
+def _read_jsonl(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path) as corpus_file:
+        for line in corpus_file:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a local BM25 search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Add documents from JSON lines files")
+    ingest.add_argument("index")
+    ingest.add_argument("files", nargs="+")
+    search = commands.add_parser("search", help="Print the best matches for a query")
+    search.add_argument("index")
+    search.add_argument("query")
+    search.add_argument("--max-results", type=int, default=5)
+    args = parser.parse_args()
+
+    index = LocalSearchIndex(args.index)
+    if args.command == "ingest":
+        for path in args.files:
+            print(f"{path}: {index.add_documents(_read_jsonl(path))} documents added")
+    else:
+        for document, score in index.search_sync(args.query, args.max_results):
+            print(f"{score:7.3f}  {document['title']}  {document['url']}")
+
+if __name__ == "__main__":
+    main()
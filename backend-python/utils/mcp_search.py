@@ -7,26 +7,72 @@ Only use search when agents need:
 2. Fresh, up-to-date recent data not available in training
 """
 
-import subprocess
+import asyncio
 import json
 import logging
-import openai
 import os
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict
+from .cache import SingleFlight, create_cache
+from .health import HEALTHY, HealthTracker
+from .mcp_session import MCPSessionError, MCPSessionPool
+from .keyword_matcher import KeywordMatcher, normalize_text
+from .llm_client import create_chat_completion
+from .local_search import LocalSearchIndex
+from .query_context import TOKEN_PATTERN, QueryContext, QueryLike
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client for search decisions (optional)
-openai_client = None
-try:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        openai_client = openai.OpenAI(api_key=api_key)
-    else:
-        logger.warning("OPENAI_API_KEY not set - LLM search decisions will use fallback logic")
-except Exception as e:
-    logger.warning(f"Failed to initialize OpenAI client: {e} - Using fallback search decisions")
+# Maximum (query, agent) pairs per batched search-decision LLM call
+SEARCH_DECISION_BATCH_SIZE = int(os.getenv("SEARCH_DECISION_BATCH_SIZE", "20"))
+
+# Cache of LLM search decisions keyed on (expertise, normalized query).
+# Set SEARCH_DECISION_CACHE_PATH to an SQLite file to persist decisions
+# across restarts and share them between uvicorn workers.
+SEARCH_DECISION_CACHE_TTL = float(os.getenv("SEARCH_DECISION_CACHE_TTL_SECONDS", "21600"))
+SEARCH_DECISION_CACHE_MAX_SIZE = int(os.getenv("SEARCH_DECISION_CACHE_MAX_SIZE", "10000"))
+SEARCH_DECISION_CACHE_PATH = os.getenv("SEARCH_DECISION_CACHE_PATH")
+
+# Cache of MCP search results shared by every agent and request. Results
+# for one user query are also pooled so a narrower per-agent query can be
+# answered by re-filtering them locally instead of searching again, when
+# enough pooled results mention every one of the agent's narrowing terms.
+SEARCH_RESULT_CACHE_TTL = float(os.getenv("SEARCH_RESULT_CACHE_TTL_SECONDS", "900"))
+SEARCH_RESULT_CACHE_MAX_SIZE = int(os.getenv("SEARCH_RESULT_CACHE_MAX_SIZE", "2000"))
+SEARCH_RESULT_CACHE_PATH = os.getenv("SEARCH_RESULT_CACHE_PATH")
+SEARCH_RESULT_POOL_MAX_SIZE = 50  # Pooled results kept per user query
+SEARCH_REFILTER_MIN_RESULTS = int(os.getenv("SEARCH_REFILTER_MIN_RESULTS", "3"))
+
+# Opt-in: start the search alongside the search decision for queries with
+# time-sensitive triggers, cancelling it if the decision is negative
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "false").lower() == "true"
+
+# Where search() gets results: "mcp" (the MCP search server) or "local"
+# (an offline BM25 index over a document corpus, built with
+# `python -m utils.local_search ingest`)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mcp").lower()
+LOCAL_SEARCH_INDEX_PATH = os.getenv("LOCAL_SEARCH_INDEX_PATH", "./search-index")
+
+# Pool of long-lived MCP search server sessions (stdio JSON-RPC)
+MCP_SEARCH_COMMAND = os.getenv("MCP_SEARCH_COMMAND", "mcp-search-server")
+MCP_SEARCH_TOOL = os.getenv("MCP_SEARCH_TOOL", "search")
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "4"))
+MCP_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MCP_REQUEST_TIMEOUT_SECONDS", "10"))
+
+# Availability probing of the MCP search server. The probe pings the pooled
+# sessions in the background (never on import or on the request path) and
+# repeats so the server can recover, or be marked unavailable, without a
+# restart.
+MCP_PROBE_TIMEOUT_SECONDS = float(os.getenv("MCP_PROBE_TIMEOUT_SECONDS", "5"))
+MCP_PROBE_INTERVAL_SECONDS = float(os.getenv("MCP_PROBE_INTERVAL_SECONDS", "60"))
+MCP_FAILURE_THRESHOLD = int(os.getenv("MCP_FAILURE_THRESHOLD", "3"))
+MCP_CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("MCP_CIRCUIT_COOLDOWN_SECONDS", "30"))
+
+# Keyword heuristics used when the LLM search decision is unavailable
+FALLBACK_TRIGGER_MATCHER = KeywordMatcher({
+    "fresh_data": ['latest', 'recent', 'current', '2024', '2025', 'today', 'now'],
+    "deep_expertise": ['advanced', 'cutting-edge', 'state-of-the-art', 'research']
+})
 
 @dataclass
 class SearchResult:
@@ -48,29 +94,111 @@ class MCPSearchClient:
     """Client for interacting with MCP search server"""
     
     def __init__(self):
-        self.is_available = self._check_mcp_availability()
-        
-    def _check_mcp_availability(self) -> bool:
-        """Check if MCP search server is available"""
+        self.health = HealthTracker(
+            failure_threshold=MCP_FAILURE_THRESHOLD,
+            open_cooldown=MCP_CIRCUIT_COOLDOWN_SECONDS
+        )
+        self._probe_task: Optional[asyncio.Task] = None
+        self.session_pool = MCPSessionPool(
+            MCP_SEARCH_COMMAND,
+            size=MCP_POOL_SIZE,
+            request_timeout=MCP_REQUEST_TIMEOUT_SECONDS
+        )
+        self.local_index: Optional[LocalSearchIndex] = None
+        if SEARCH_BACKEND == "local":
+            self.local_index = LocalSearchIndex(LOCAL_SEARCH_INDEX_PATH)
+            logger.info(f"Using local search index at {LOCAL_SEARCH_INDEX_PATH} ({len(self.local_index)} documents)")
+        elif SEARCH_BACKEND != "mcp":
+            logger.warning(f"Unknown SEARCH_BACKEND {SEARCH_BACKEND!r} - using the MCP search server")
+        self.decision_cache = create_cache(
+            "search_decisions",
+            max_size=SEARCH_DECISION_CACHE_MAX_SIZE,
+            ttl=SEARCH_DECISION_CACHE_TTL,
+            path=SEARCH_DECISION_CACHE_PATH
+        )
+        self.result_cache = create_cache(
+            "search_results",
+            max_size=SEARCH_RESULT_CACHE_MAX_SIZE,
+            ttl=SEARCH_RESULT_CACHE_TTL,
+            path=SEARCH_RESULT_CACHE_PATH
+        )
+        self._inflight_searches = SingleFlight()
+        self.refiltered_searches = 0
+        self.speculative_search = SPECULATIVE_SEARCH
+        self.speculation = {"used": 0, "wasted": 0, "saved_seconds": 0.0, "wasted_seconds": 0.0}
+    
+    @property
+    def is_available(self) -> bool:
+        """
+        Non-blocking availability check. Starts background probing on first
+        use inside an event loop; until a probe succeeds the server is
+        treated as unavailable. A local index is always available.
+        """
+        if self.local_index is not None:
+            return True
+        self.start_background_probing()
+        return self.health.is_available
+    
+    async def probe(self) -> bool:
+        """Health-check the session pool once (starting a session if needed), updating health"""
         try:
-            # Test MCP server availability
-            result = subprocess.run(
-                ["mcp-search-server", "--help"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.returncode == 0
+            # asyncio.timeout, unlike wait_for on 3.11, never swallows the
+            # cancellation stop_background_probing() sends mid-probe
+            async with asyncio.timeout(MCP_PROBE_TIMEOUT_SECONDS):
+                healthy = await self.session_pool.health_check(MCP_PROBE_TIMEOUT_SECONDS)
+            if not healthy:
+                raise MCPSessionError("no MCP session answered ping")
         except Exception as e:
-            logger.warning(f"MCP search server not available: {e}")
+            previous_state = self.health.state
+            self.health.record_failure(str(e) or "probe timed out")
+            if self.health.state != previous_state or self.health.failures == 1:
+                logger.warning(f"MCP search server not available ({self.health.state}): {self.health.last_error}")
             return False
+        
+        if self.health.state != HEALTHY:
+            logger.info("MCP search server available")
+        self.health.record_success()
+        return True
     
-    async def should_search(self, query: str, expertise_area: str, agent_name: str) -> SearchDecision:
+    async def _probe_loop(self):
+        while True:
+            await self.probe()
+            if asyncio.current_task().cancelling():
+                # A stop request landed while an inner wait_for was completing
+                raise asyncio.CancelledError()
+            await asyncio.sleep(self.health.next_check_delay(MCP_PROBE_INTERVAL_SECONDS))
+    
+    def start_background_probing(self):
+        """Start the periodic probe on the running loop; no-op outside a loop or if already running"""
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._probe_task = loop.create_task(self._probe_loop())
+    
+    async def stop_background_probing(self):
+        if self._probe_task is None:
+            return
+        self._probe_task.cancel()
+        try:
+            await self._probe_task
+        except asyncio.CancelledError:
+            pass
+        self._probe_task = None
+    
+    async def close(self):
+        """Stop probing and shut down the pooled server sessions"""
+        await self.stop_background_probing()
+        await self.session_pool.close()
+    
+    async def should_search(self, query: QueryLike, expertise_area: str, agent_name: str) -> SearchDecision:
         """
         Use LLM to intelligently determine if search is needed
         
         Args:
-            query: The user query
+            query: The user query (or its shared QueryContext)
             expertise_area: Agent's area of expertise  
             agent_name: Name of the expert agent
             
@@ -85,10 +213,16 @@ class MCPSearchClient:
                 search_type="none"
             )
         
+        query = QueryContext.of(query)
+        cache_key = self._decision_cache_key(query, expertise_area)
+        cached = self._cached_decision(cache_key)
+        if cached is not None:
+            return cached
+        
         search_decision_prompt = f"""
 Analyze whether this expert agent should use web search to enhance their response.
 
-QUERY: "{query}"
+QUERY: "{query.raw}"
 AGENT: {agent_name}
 EXPERTISE: {expertise_area}
 
@@ -114,10 +248,7 @@ Respond in this exact JSON format:
 }}"""
 
         try:
-            if not openai_client:
-                raise Exception("OpenAI client not available")
-                
-            response = openai_client.chat.completions.create(
+            response = await create_chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a search decision analyzer. Respond only with valid JSON as specified."},
@@ -136,22 +267,179 @@ Respond in this exact JSON format:
             )
             
             logger.info(f"Search decision for {agent_name}: {'SEARCH' if decision.should_search else 'NO SEARCH'} ({decision.search_type}, confidence: {decision.confidence})")
+            self.decision_cache.set(cache_key, asdict(decision))
             return decision
             
         except Exception as e:
             logger.warning(f"LLM search decision failed, using fallback: {e}")
             return self._fallback_search_decision(query, expertise_area)
     
-    def _fallback_search_decision(self, query: str, expertise_area: str) -> SearchDecision:
-        """Fallback search decision using keyword heuristics"""
-        query_lower = query.lower()
+    async def should_search_batch(self, requests: List[Tuple[QueryLike, str, str]], timeout: Optional[float] = None) -> List[SearchDecision]:
+        """
+        Decide search for many (query, expertise_area, agent_name) requests at once
         
+        Requests are grouped into as few LLM calls as possible (up to
+        SEARCH_DECISION_BATCH_SIZE pairs per call), sent concurrently. Any
+        request the LLM does not answer within timeout falls back to the
+        keyword heuristics.
+        
+        Args:
+            requests: (query, expertise_area, agent_name) tuples
+            timeout: Seconds to wait for the LLM calls; None waits for all
+            
+        Returns:
+            List[SearchDecision]: One decision per request, in input order
+        """
+        if not self.is_available:
+            return [SearchDecision(
+                should_search=False,
+                reasoning="MCP search server not available",
+                confidence=1.0,
+                search_type="none"
+            ) for _ in requests]
+        
+        cache_keys = [self._decision_cache_key(query, expertise_area) 
+                      for query, expertise_area, _ in requests]
+        decisions: List[Optional[SearchDecision]] = [self._cached_decision(key) for key in cache_keys]
+        
+        # Only uncached requests go to the LLM, one concurrent call per chunk
+        misses = [i for i, decision in enumerate(decisions) if decision is None]
+        chunks = {}
+        for start in range(0, len(misses), SEARCH_DECISION_BATCH_SIZE):
+            chunk = misses[start:start + SEARCH_DECISION_BATCH_SIZE]
+            task = asyncio.create_task(self._llm_batch_search_decisions([requests[i] for i in chunk]))
+            chunks[task] = chunk
+        
+        if chunks:
+            done, pending = await asyncio.wait(chunks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"{len(pending)} batched search-decision calls missed the deadline, using fallback")
+            for task in done:
+                chunk = chunks[task]
+                for offset, decision in task.result().items():
+                    decisions[chunk[offset]] = decision
+                    self.decision_cache.set(cache_keys[chunk[offset]], asdict(decision))
+        
+        return [
+            decision or self._fallback_search_decision(query, expertise_area)
+            for decision, (query, expertise_area, _) in zip(decisions, requests)
+        ]
+    
+    async def _llm_batch_search_decisions(self, requests: List[Tuple[QueryLike, str, str]]) -> Dict[int, SearchDecision]:
+        """Ask the LLM for all decisions in one call, keyed by position in requests"""
+        request_lines = "\n".join(
+            f'{{"id": {i}, "query": {json.dumps(str(query))}, "agent": {json.dumps(agent_name)}, "expertise": {json.dumps(expertise_area)}}}'
+            for i, (query, expertise_area, agent_name) in enumerate(requests)
+        )
+        
+        batch_decision_prompt = f"""
+Analyze whether each expert agent below should use web search to enhance their response to its query.
+
+REQUESTS:
+{request_lines}
+
+Consider these search scenarios:
+
+1. DEEP_EXPERTISE: Agent needs current research, methodologies, or advanced techniques in their field
+2. FRESH_DATA: Query requires recent events, current statistics, or real-time information  
+3. COMPREHENSIVE: Complex query needing broad current context beyond training data
+4. NONE: Agent's existing knowledge is sufficient
+
+Evaluate each request independently:
+- Does the query ask for "latest", "recent", "current", or time-specific information?
+- Does it require deep technical knowledge that benefits from current research?
+- Is it asking about events, trends, or developments after the training cutoff?
+- Would current web sources significantly improve the response quality?
+
+Respond in this exact JSON format, with one decision per request id:
+{{
+  "decisions": [
+    {{
+      "id": number,
+      "should_search": boolean,
+      "reasoning": "Brief explanation of decision",
+      "confidence": number (0.0-1.0),
+      "search_type": "deep_expertise" | "fresh_data" | "comprehensive" | "none"
+    }}
+  ]
+}}"""
+
+        try:
+            response = await create_chat_completion(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a search decision analyzer. Respond only with valid JSON as specified."},
+                    {"role": "user", "content": batch_decision_prompt}
+                ],
+                temperature=0.3,
+                max_tokens=100 + 80 * len(requests)
+            )
+            
+            decision_data = json.loads(response.choices[0].message.content.strip())
+            decisions = {}
+            for item in decision_data.get("decisions", []):
+                request_id = item.get("id")
+                if isinstance(request_id, int) and 0 <= request_id < len(requests):
+                    decisions[request_id] = SearchDecision(
+                        should_search=item["should_search"],
+                        reasoning=item["reasoning"],
+                        confidence=item["confidence"],
+                        search_type=item["search_type"]
+                    )
+            
+            logger.info(f"Batched search decision: {len(decisions)}/{len(requests)} answered in one LLM call")
+            return decisions
+            
+        except Exception as e:
+            logger.warning(f"Batched LLM search decision failed, using fallback: {e}")
+            return {}
+    
+    def _decision_cache_key(self, query: QueryLike, expertise_area: str) -> str:
+        return f"{expertise_area.strip().lower()}|{QueryContext.of(query).normalized}"
+    
+    def _cached_decision(self, cache_key: str) -> Optional[SearchDecision]:
+        data = self.decision_cache.get(cache_key)
+        return SearchDecision(**data) if data is not None else None
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the search-decision and search-result caches"""
+        return {
+            "decision_cache": self.decision_cache.stats(),
+            "result_cache": self.result_cache.stats(),
+            "result_single_flight": self._inflight_searches.stats(),
+            "refiltered_searches": self.refiltered_searches,
+            "speculation": self.speculation,
+            "local_index": self.local_index.stats() if self.local_index is not None else None
+        }
+    
+    def should_speculate(self, query: QueryLike) -> bool:
+        """Whether to start searching before the decision: opted in and the query is time-sensitive"""
+        return self.speculative_search and bool(
+            QueryContext.of(query).keyword_hits(FALLBACK_TRIGGER_MATCHER)["fresh_data"]
+        )
+    
+    def record_speculation(self, used: bool, overlap_seconds: float):
+        """
+        Account for one speculative search. overlap_seconds is how long it ran
+        before the decision arrived: latency saved if the search was used,
+        work wasted if the decision was negative.
+        """
+        if used:
+            self.speculation["used"] += 1
+            self.speculation["saved_seconds"] += overlap_seconds
+        else:
+            self.speculation["wasted"] += 1
+            self.speculation["wasted_seconds"] += overlap_seconds
+    
+    def _fallback_search_decision(self, query: QueryLike, expertise_area: str) -> SearchDecision:
+        """Fallback search decision using keyword heuristics"""
         # Basic keyword-based fallback
-        fresh_data_triggers = ['latest', 'recent', 'current', '2024', '2025', 'today', 'now']
-        deep_expertise_triggers = ['advanced', 'cutting-edge', 'state-of-the-art', 'research']
+        triggers = QueryContext.of(query).keyword_hits(FALLBACK_TRIGGER_MATCHER)
         
-        needs_fresh = any(trigger in query_lower for trigger in fresh_data_triggers)
-        needs_deep = any(trigger in query_lower for trigger in deep_expertise_triggers)
+        needs_fresh = bool(triggers["fresh_data"])
+        needs_deep = bool(triggers["deep_expertise"])
         
         if needs_fresh:
             return SearchDecision(
@@ -175,42 +463,152 @@ Respond in this exact JSON format:
                 search_type="none"
             )
     
-    def search(self, query: str, domain: str = "", expertise_keywords: List[str] = None, max_results: int = 5) -> List[SearchResult]:
+    async def search(self, query: str, domain: str = "", expertise_keywords: List[str] = None, max_results: int = 5) -> List[SearchResult]:
         """
         Perform web search using MCP server
         
+        Repeated searches are served from the shared result cache, and
+        identical searches already in flight are joined rather than repeated.
+        
         Args:
             query: Search query
+            domain: Agent domain appended to narrow the query
+            expertise_keywords: Agent keywords; the first two narrow the query
             max_results: Maximum number of results to return
             
         Returns:
             List[SearchResult]: Search results
         """
+        # Build enhanced search query
+        narrowing_terms = []
+        if domain:
+            narrowing_terms.extend(domain.replace('-', ' ').split())
+        if expertise_keywords:
+            narrowing_terms.extend(expertise_keywords[:2])
+        search_query = " ".join([query] + narrowing_terms)
+        
+        cache_key = normalize_text(search_query)
+        cached = self.result_cache.get(f"exact|{cache_key}")
+        if cached is not None and cached["max_results"] >= max_results:
+            return [SearchResult(**item) for item in cached["results"][:max_results]]
+        
+        # Serve a narrower per-agent query from results other agents already
+        # fetched for the same user query, if enough of them match all its terms
+        refiltered = self._refilter_pooled_results(query, narrowing_terms)
+        if len(refiltered) >= min(max_results, SEARCH_REFILTER_MIN_RESULTS):
+            self.refiltered_searches += 1
+            logger.info(f"Served search for {search_query} from {len(refiltered)} pooled results")
+            return refiltered[:max_results]
+        
         if not self.is_available:
             logger.warning("MCP search not available, returning empty results")
             return []
-            
+        
         try:
-            # Build enhanced search query
-            search_query = query
-            if domain:
-                search_query += f" {domain.replace('-', ' ')}"
-            if expertise_keywords:
-                search_query += f" {' '.join(expertise_keywords[:2])}"
-            
-            logger.info(f"Performing MCP search for: {search_query}")
-            
-            # TODO: Implement actual MCP search server call
-            # For now, return empty results as we're focusing on LLM-generated sources
-            results = []
-            
+            results = await self._inflight_searches.do(
+                (cache_key, max_results),
+                lambda: self._fetch_search_results(query, search_query, max_results)
+            )
             logger.info(f"Returned {len(results)} search results")
-            return results
+            return [SearchResult(**asdict(result)) for result in results]
             
         except Exception as e:
             logger.error(f"MCP search failed: {e}")
             return []
     
+    async def _fetch_search_results(self, query: str, search_query: str, max_results: int) -> List[SearchResult]:
+        """One backend search, cached under the exact query and pooled under the user query"""
+        if self.local_index is not None:
+            results = self._search_local_index(search_query, max_results)
+        else:
+            results = await self._search_mcp_server(search_query, max_results)
+        
+        items = [asdict(result) for result in results]
+        self.result_cache.set(f"exact|{normalize_text(search_query)}", {"max_results": max_results, "results": items})
+        
+        pool_key = f"pool|{normalize_text(query)}"
+        pooled = self.result_cache.get(pool_key) or []
+        seen_urls = {item["url"] for item in pooled}
+        pooled.extend(item for item in items if item["url"] not in seen_urls)
+        self.result_cache.set(pool_key, pooled[-SEARCH_RESULT_POOL_MAX_SIZE:])
+        return results
+    
+    async def _search_mcp_server(self, search_query: str, max_results: int) -> List[SearchResult]:
+        logger.info(f"Performing MCP search for: {search_query}")
+        try:
+            tool_result = await self.session_pool.call_tool(
+                MCP_SEARCH_TOOL, {"query": search_query, "max_results": max_results}
+            )
+            results = self._parse_search_results(tool_result)[:max_results]
+        except Exception as e:
+            self.health.record_failure(e)
+            raise
+        self.health.record_success()
+        return results
+    
+    def _search_local_index(self, search_query: str, max_results: int) -> List[SearchResult]:
+        """BM25 search of the local index; runs inline since a query takes milliseconds"""
+        logger.info(f"Performing local index search for: {search_query}")
+        return [
+            SearchResult(title=document["title"], url=document["url"], snippet=document["snippet"], relevance_score=score)
+            for document, score in self.local_index.search_sync(search_query, max_results)
+        ]
+    
+    def _refilter_pooled_results(self, query: str, narrowing_terms: List[str]) -> List[SearchResult]:
+        """
+        Pooled results for query that mention every narrowing term. The pool
+        holds what other agents' narrower searches returned, so matching
+        only some terms (often a generic word such as "analysis" that
+        several domains share) would hand one agent another's results.
+        """
+        terms = {term.lower() for term in narrowing_terms}
+        if not terms:
+            return []
+        pooled = self.result_cache.get(f"pool|{normalize_text(query)}")
+        if not pooled:
+            return []
+        
+        matches = []
+        for item in pooled:
+            text = normalize_text(f"{item['title']} {item['snippet']}")
+            tokens = set(TOKEN_PATTERN.findall(text))
+            if all(term in tokens if " " not in term else term in text for term in terms):
+                matches.append(SearchResult(**item))
+        matches.sort(key=lambda result: result.relevance_score, reverse=True)
+        return matches
+    
+    def _parse_search_results(self, tool_result: Dict[str, Any]) -> List[SearchResult]:
+        """
+        Extract results from an MCP tools/call result: structuredContent
+        {"results": [...]}, or text content holding a JSON list of
+        {title, url, snippet} objects
+        """
+        if tool_result.get("isError"):
+            raise MCPSessionError("MCP search tool returned an error")
+        
+        items = (tool_result.get("structuredContent") or {}).get("results")
+        if items is None:
+            items = []
+            for content in tool_result.get("content", []):
+                if content.get("type") != "text":
+                    continue
+                try:
+                    parsed = json.loads(content["text"])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+                items.extend(parsed if isinstance(parsed, list) else parsed.get("results", []))
+        
+        return [
+            SearchResult(
+                title=item.get("title", ""),
+                url=item.get("url", item.get("href", "")),
+                snippet=item.get("snippet", item.get("body", "")),
+                relevance_score=float(item.get("relevance_score", 0.0))
+            )
+            for item in items
+            if isinstance(item, dict) and (item.get("url") or item.get("href"))
+        ]
+    
     def format_search_context(self, results: List[SearchResult], query: str, search_type: str) -> str:
         """
         Format search results into context for agent use
@@ -0,0 +1,252 @@
+"""
+Pooled MCP Server Sessions
+
+Long-lived `mcp-search-server` processes spoken to over stdio with
+newline-delimited JSON-RPC 2.0, the MCP stdio transport. Each session
+multiplexes many in-flight requests, matching responses to callers by
+request id, so concurrent agent searches share a few warm processes
+instead of spawning one per search. The pool scales out to its size
+under concurrency, replaces sessions that die and health-checks the rest
+with MCP `ping` requests.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import shlex
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+MCP_PROTOCOL_VERSION = "2024-11-05"
+STDOUT_LIMIT = 2 ** 20  # Largest single JSON-RPC message read from a server
+
+class MCPSessionError(Exception):
+    """A session died, timed out or returned a JSON-RPC error"""
+
+class MCPSession:
+    """One MCP server process with any number of concurrent requests in flight"""
+
+    def __init__(self, command: List[str], request_timeout: float = 10.0):
+        self.command = command
+        self.request_timeout = request_timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._reader_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._closed = False
+        self.requests = 0
+
+    @property
+    def is_alive(self) -> bool:
+        return not self._closed and self.process is not None and self.process.returncode is None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        """Spawn the server and complete the MCP initialize handshake"""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=STDOUT_LIMIT
+        )
+        self._reader_task = asyncio.create_task(self._read_responses())
+        try:
+            await self.request("initialize", {
+                "protocolVersion": MCP_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "expert-agentic-platform", "version": "1.0.0"}
+            })
+            await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        except BaseException:
+            await self.close()
+            raise
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+        """Send one JSON-RPC request and wait for its result"""
+        if not self.is_alive:
+            raise MCPSessionError("MCP session is not running")
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.requests += 1
+        try:
+            message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+            if params is not None:
+                message["params"] = params
+            await self._send(message)
+            async with asyncio.timeout(timeout or self.request_timeout):
+                return await future
+        except TimeoutError:
+            raise MCPSessionError(f"MCP request {method} timed out")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.request("tools/call", {"name": name, "arguments": arguments})
+
+    async def ping(self, timeout: Optional[float] = None):
+        await self.request("ping", timeout=timeout)
+
+    async def _send(self, message: Dict[str, Any]):
+        data = (json.dumps(message) + "\n").encode()
+        async with self._write_lock:
+            try:
+                self.process.stdin.write(data)
+                await self.process.stdin.drain()
+            except (ConnectionError, RuntimeError) as e:
+                raise MCPSessionError(f"MCP session write failed: {e}")
+
+    async def _read_responses(self):
+        """Route every response line to the request waiting on its id"""
+        error: Exception = MCPSessionError("MCP server exited")
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"Ignoring non-JSON line from MCP server: {line[:200]!r}")
+                    continue
+
+                future = self._pending.get(message.get("id")) if "method" not in message else None
+                if future is None or future.done():
+                    continue  # Server notifications/requests and late responses
+                if "error" in message:
+                    future.set_exception(MCPSessionError(message["error"].get("message", "MCP error")))
+                else:
+                    future.set_result(message.get("result"))
+        except Exception as e:
+            error = MCPSessionError(f"MCP session read failed: {e}")
+        finally:
+            self._closed = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self):
+        self._closed = True
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), timeout=2)
+            except (asyncio.TimeoutError, ConnectionError, RuntimeError):
+                self.process.kill()
+                await self.process.wait()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
+class MCPSessionPool:
+    """
+    Up to `size` long-lived sessions, started on demand
+
+    A call goes to the least busy live session. When every live session
+    already has requests in flight, another session is started in the
+    background and the call proceeds on the live one; calls only wait for a
+    startup when no session is running at all.
+    """
+
+    def __init__(self, command: str, size: int = 4, request_timeout: float = 10.0):
+        self.command = shlex.split(command)
+        self.size = size
+        self.request_timeout = request_timeout
+        self._sessions: List[MCPSession] = []
+        self._starting: Set[asyncio.Task] = set()  # Reserved slots whose session is starting
+        self.sessions_started = 0
+        self.sessions_replaced = 0
+        self.calls = 0
+        self.failures = 0
+
+    async def _acquire(self) -> MCPSession:
+        while True:
+            live = [session for session in self._sessions if session.is_alive]
+            self.sessions_replaced += len(self._sessions) - len(live)
+            self._sessions = live
+
+            session = min(live, key=lambda s: s.in_flight, default=None)
+            if (session is None or session.in_flight) and len(live) + len(self._starting) < self.size:
+                task = asyncio.ensure_future(self._start_session())
+                self._starting.add(task)
+                task.add_done_callback(self._start_finished)
+                if session is None:
+                    return await asyncio.shield(task)
+            if session is not None:
+                return session
+
+            # Every slot is already starting; wait for one of them and retry
+            await asyncio.wait(self._starting, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _start_session(self) -> MCPSession:
+        session = MCPSession(self.command, self.request_timeout)
+        async with asyncio.timeout(self.request_timeout):
+            await session.start()
+        self._sessions.append(session)
+        self.sessions_started += 1
+        return session
+
+    def _start_finished(self, task: asyncio.Task):
+        self._starting.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Could not start MCP session: {task.exception()!r}")
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Call an MCP tool on the least busy session"""
+        self.calls += 1
+        try:
+            session = await self._acquire()
+            return await session.call_tool(name, arguments)
+        except Exception:
+            self.failures += 1
+            raise
+
+    async def health_check(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ping every live session, dropping the ones that fail. Starts a
+        session if none is running. True if at least one session answered.
+        """
+        await self._acquire()
+        sessions = [session for session in self._sessions if session.is_alive]
+        results = await asyncio.gather(
+            *(session.ping(timeout) for session in sessions),
+            return_exceptions=True
+        )
+        healthy = 0
+        for session, result in zip(sessions, results):
+            if isinstance(result, Exception):
+                logger.warning(f"MCP session failed health check: {result}")
+                await session.close()
+            else:
+                healthy += 1
+        return healthy > 0
+
+    async def close(self):
+        for task in list(self._starting):
+            task.cancel()
+        await asyncio.gather(*self._starting, return_exceptions=True)
+        sessions, self._sessions = self._sessions, []
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        live = [session for session in self._sessions if session.is_alive]
+        return {
+            "size": self.size,
+            "live_sessions": len(live),
+            "in_flight": sum(session.in_flight for session in live),
+            "sessions_started": self.sessions_started,
+            "sessions_replaced": self.sessions_replaced,
+            "calls": self.calls,
+            "failures": self.failures
+        }
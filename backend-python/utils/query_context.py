@@ -0,0 +1,54 @@
+"""
+Per-Request Query Context
+
+A QueryContext is created once per request and passed through the
+orchestrator, the agents and the search client, so the query is
+normalized, tokenized and scanned for each keyword matcher only once.
+"""
+
+import re
+from typing import Dict, List, Optional, Set, Union
+
+from .keyword_matcher import KeywordMatcher, normalize_text
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+class QueryContext:
+    """Normalized text, tokens, n-grams and cached keyword hits for one query"""
+
+    def __init__(self, query: str, max_ngram: int = 3):
+        self.raw = query
+        self.normalized = normalize_text(query)
+        self.tokens: List[str] = TOKEN_PATTERN.findall(self.normalized)
+        self.max_ngram = max_ngram
+        self._ngrams: Optional[Set[str]] = None
+        self._keyword_hits: Dict[KeywordMatcher, Dict[str, Set[str]]] = {}
+
+    @classmethod
+    def of(cls, query: "QueryLike") -> "QueryContext":
+        """Return query itself if it is already a context, else build one"""
+        return query if isinstance(query, QueryContext) else cls(query)
+
+    @property
+    def ngrams(self) -> Set[str]:
+        """Token n-grams (1..max_ngram), joined with single spaces"""
+        if self._ngrams is None:
+            self._ngrams = {
+                " ".join(self.tokens[start:start + size])
+                for size in range(1, self.max_ngram + 1)
+                for start in range(len(self.tokens) - size + 1)
+            }
+        return self._ngrams
+
+    def keyword_hits(self, matcher: KeywordMatcher) -> Dict[str, Set[str]]:
+        """Hits for every keyword set of matcher, scanned at most once per context"""
+        hits = self._keyword_hits.get(matcher)
+        if hits is None:
+            hits = matcher.scan_normalized(self.normalized)
+            self._keyword_hits[matcher] = hits
+        return hits
+
+    def __str__(self) -> str:
+        return self.raw
+
+QueryLike = Union[str, QueryContext]
@@ -0,0 +1,135 @@
+"""
+Background Source Generation Queue
+
+Lets agents return their content immediately and generate sources after
+the fact. Jobs go on a bounded queue served by a fixed set of worker
+tasks; when the queue is full, submitters wait up to put_timeout for room
+(backpressure) and are then turned away, so a burst cannot pile up
+unbounded LLM and validation work. Finished jobs are kept for result_ttl
+seconds for the follow-up endpoint and streaming responses to collect.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SOURCE_QUEUE_MAX_SIZE = int(os.getenv("SOURCE_QUEUE_MAX_SIZE", "100"))
+SOURCE_WORKERS = int(os.getenv("SOURCE_WORKERS", "4"))
+SOURCE_QUEUE_PUT_TIMEOUT_SECONDS = float(os.getenv("SOURCE_QUEUE_PUT_TIMEOUT_SECONDS", "1"))
+SOURCE_JOB_TTL_SECONDS = float(os.getenv("SOURCE_JOB_TTL_SECONDS", "600"))
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+class SourceJobQueue:
+    """Bounded queue of source-generation jobs, each looked up later by its id"""
+
+    def __init__(self, max_size: int = 100, workers: int = 4, put_timeout: float = 1.0, result_ttl: float = 600.0):
+        self.max_size = max_size
+        self.workers = workers
+        self.put_timeout = put_timeout
+        self.jobs = TTLCache(max_size=max(1024, max_size * 10), ttl=result_ttl)
+        self._done: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        """Start the workers on the running loop; called from the app lifespan, or lazily on submit"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._done = {}
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._loop = loop
+
+    async def close(self):
+        """Stop the workers; queued jobs are abandoned"""
+        tasks, self._worker_tasks, self._loop = self._worker_tasks, [], None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, generate: Callable[[], Awaitable[Any]]) -> Optional[str]:
+        """
+        Queue a job and return its id, or None if the queue stayed full for
+        put_timeout seconds
+        """
+        self.start()
+        job_id = uuid.uuid4().hex
+        self.jobs.set(job_id, {"status": PENDING, "sources": []})
+        self._done[job_id] = asyncio.Event()
+        try:
+            async with asyncio.timeout(self.put_timeout):
+                await self._queue.put((job_id, generate))
+        except TimeoutError:
+            self.jobs.delete(job_id)
+            self._done.pop(job_id, None)
+            self.rejected += 1
+            logger.warning(f"Source queue full ({self.max_size} jobs) - skipping source generation")
+            return None
+        self.submitted += 1
+        return job_id
+
+    async def _worker(self):
+        while True:
+            job_id, generate = await self._queue.get()
+            try:
+                sources = await generate()
+                self.jobs.set(job_id, {"status": READY, "sources": sources})
+                self.completed += 1
+            except Exception as e:
+                logger.error(f"Background source generation failed: {e}")
+                self.jobs.set(job_id, {"status": FAILED, "sources": [], "error": str(e)})
+                self.failed += 1
+            finally:
+                event = self._done.pop(job_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's status and sources, or None if unknown or expired"""
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Like get(), but waits up to timeout seconds for a pending job to finish"""
+        event = self._done.get(job_id)
+        if event is not None and timeout > 0:
+            try:
+                async with asyncio.timeout(timeout):
+                    await event.wait()
+            except TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+# Global instance
+source_jobs = SourceJobQueue(
+    max_size=SOURCE_QUEUE_MAX_SIZE,
+    workers=SOURCE_WORKERS,
+    put_timeout=SOURCE_QUEUE_PUT_TIMEOUT_SECONDS,
+    result_ttl=SOURCE_JOB_TTL_SECONDS
+)